@@ -0,0 +1,18 @@
+"""
+ASGI config for Uni_Link project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Uni_Link.settings')
+# Под ASGI входът и таблата са async (unilink.async_views); UNILINK_ASYNC_VIEWS=0 ги изключва.
+os.environ.setdefault('UNILINK_ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
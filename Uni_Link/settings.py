@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'unilink.middleware.PerformanceMetricsMiddleware',
+    'unilink.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,39 +63,202 @@ ROOT_URLCONF = 'Uni_Link.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates']
-        ,
+        # Шаблоните на проекта (вкл. тези за админа) са в Uni_Link/templates.
+        'DIRS': [BASE_DIR / 'Uni_Link' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'unilink.page_cache.csrf_placeholder',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'Uni_Link.wsgi.application'
+ASGI_APPLICATION = 'Uni_Link.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Настройките на базата се четат от средата (UNILINK_DB_*); стойностите по подразбиране са
+# за локална разработка. Сравнение на режимите: manage.py bench_db_connections.
+#
+# UNILINK_DB_CONN_MAX_AGE       – секунди живот на постоянна връзка (0 = нова връзка за всяка заявка).
+# UNILINK_DB_POOL=1             – пул от връзки в процеса (psycopg[pool]); вместо CONN_MAX_AGE.
+# UNILINK_DB_STATEMENT_TIMEOUT  – лимит за една SQL заявка в ms (0 = без лимит).
+# UNILINK_DB_PGBOUNCER=1        – зад PgBouncer в transaction режим: без server-side курсори и без
+#                                 параметри при свързване (statement_timeout се задава с ALTER ROLE).
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+UNILINK_DB_POOL = env_bool('UNILINK_DB_POOL')
+UNILINK_DB_PGBOUNCER = env_bool('UNILINK_DB_PGBOUNCER')
+UNILINK_DB_STATEMENT_TIMEOUT = env_int('UNILINK_DB_STATEMENT_TIMEOUT', 30_000)
+
+DATABASE_OPTIONS = {
+    'connect_timeout': env_int('UNILINK_DB_CONNECT_TIMEOUT', 5),
+}
+if UNILINK_DB_POOL:
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': env_int('UNILINK_DB_POOL_MIN_SIZE', 2),
+        'max_size': env_int('UNILINK_DB_POOL_MAX_SIZE', 10),
+        # Колко секунди заявката чака свободна връзка, преди да се откаже.
+        'timeout': env_int('UNILINK_DB_POOL_TIMEOUT', 10),
+    }
+if UNILINK_DB_STATEMENT_TIMEOUT and not UNILINK_DB_PGBOUNCER:
+    # PgBouncer в transaction режим не пропуска startup параметри като options.
+    DATABASE_OPTIONS['options'] = f'-c statement_timeout={UNILINK_DB_STATEMENT_TIMEOUT}'
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": "unilink",
-        "USER": "Eli",
-        "PASSWORD": "Arnautskaj",
-        "HOST": "127.0.0.1",
-        "PORT": "5432",
+        "NAME": os.environ.get("UNILINK_DB_NAME", "unilink"),
+        "USER": os.environ.get("UNILINK_DB_USER", "Eli"),
+        "PASSWORD": os.environ.get("UNILINK_DB_PASSWORD", "Arnautskaj"),
+        "HOST": os.environ.get("UNILINK_DB_HOST", "127.0.0.1"),
+        "PORT": os.environ.get("UNILINK_DB_PORT", "5432"),
+        # Пулът сам управлява връзките и е несъвместим с постоянни връзки.
+        "CONN_MAX_AGE": 0 if UNILINK_DB_POOL else env_int('UNILINK_DB_CONN_MAX_AGE', 60),
+        # Проверява постоянната (или взетата от пула) връзка преди първата заявка в HTTP заявката.
+        "CONN_HEALTH_CHECKS": True,
+        # Server-side курсорите (QuerySet.iterator()) живеят извън транзакцията, което
+        # PgBouncer в transaction режим не поддържа. Prepared statements Django и без
+        # това изключва (prepare_threshold=None). Без курсорите iterator() получава целия
+        # резултат наведнъж и експортите (unilink.exports) вече не са с постоянна памет.
+        "DISABLE_SERVER_SIDE_CURSORS": UNILINK_DB_PGBOUNCER,
+        "OPTIONS": DATABASE_OPTIONS,
+    }
+}
+
+# Реплики само за четене: UNILINK_DB_REPLICAS=хост[:порт][/база],... (потребителят и паролата са
+# като на основната). За локална проверка стига втора база на същия сървър, напр. 127.0.0.1/unilink_replica.
+# Кои заявки отиват към тях: unilink.routers.
+UNILINK_READ_REPLICAS = []
+for index, address in enumerate(filter(None, os.environ.get('UNILINK_DB_REPLICAS', '').split(','))):
+    address, _, name = address.strip().partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': dict(DATABASE_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
     }
+    UNILINK_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['unilink.routers.PrimaryReplicaRouter']
+# Колко секунди след запис браузърът чете само от основната база (докато репликите наваксат).
+UNILINK_REPLICA_PIN_SECONDS = env_int('UNILINK_REPLICA_PIN_SECONDS', 5)
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# UNILINK_CACHE_URL – споделен кеш за всички процеси (работниците на gunicorn и run_jobs):
+#   redis://host:6379/0 или memcached://host:11211. Без него кешът е LocMemCache, който е
+#   безопасен само с един процес (runserver): инвалидациите на потребители и избори,
+#   лимитите за вход и сесиите не се виждат в другите процеси.
+# UNILINK_SESSION_REDIS_URL – отделен Redis за сесиите; по подразбиране UNILINK_CACHE_URL.
+
+
+def cache_from_url(url, local_name):
+    if not url:
+        return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": local_name}
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    if url.startswith('memcached://'):
+        return {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": url.removeprefix('memcached://'),
+        }
+    raise ImproperlyConfigured(f'Неподдържан адрес на кеш: {url}')
+
+
+UNILINK_CACHE_URL = os.environ.get('UNILINK_CACHE_URL', '')
+
+CACHES = {
+    "default": cache_from_url(UNILINK_CACHE_URL, "unilink"),
+    "sessions": cache_from_url(os.environ.get('UNILINK_SESSION_REDIS_URL') or UNILINK_CACHE_URL, "unilink-sessions"),
 }
 
+# Sessions (unilink.sessions)
+# Четене от кеша с резервен вариант базата; запис в базата само при реална промяна.
+# Изтеклите сесии се трият с manage.py purge_sessions.
+SESSION_ENGINE = 'unilink.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Съобщенията (messages.success и т.н.) са в бисквитка и не записват в сесията.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Async views (unilink.async_views)
+# Входът и таблата имат async варианти за ASGI (uvicorn/daphne); Uni_Link.asgi ги включва
+# по подразбиране, а под WSGI остават синхронните. Сравнение: manage.py bench_concurrency.
+UNILINK_ASYNC_VIEWS = env_bool('UNILINK_ASYNC_VIEWS')
+
+# Request metrics (unilink.middleware.PerformanceMetricsMiddleware)
+# Част от заявките, за които се броят SQL заявките: всички при DEBUG (за Server-Timing),
+# 1% в продукция; Server-Timing хедърът е включен само при DEBUG.
+UNILINK_METRICS_SAMPLE_RATE = env_float('UNILINK_METRICS_SAMPLE_RATE', 1.0 if DEBUG else 0.01)
+UNILINK_SERVER_TIMING = DEBUG
+# Bearer токен за /metrics; без него endpoint-ът е достъпен само за служебни акаунти.
+UNILINK_METRICS_TOKEN = None
+
+# Login throttling (unilink.ratelimit)
+# Неуспешните опити се броят по идентификатор и по IP в кеша; при продукция с няколко
+# процеса кешът трябва да е споделен (Redis/Memcached), иначе всеки процес брои отделно.
+# Лимитите са в unilink.ratelimit.DEFAULT_LOGIN_LIMITS; UNILINK_LOGIN_LIMITS ги променя по обхват.
+UNILINK_LOGIN_THROTTLE = env_bool('UNILINK_LOGIN_THROTTLE', True)
+# Зад reverse proxy REMOTE_ADDR е адресът на proxy-то. Тогава клиентът се взима от хедъра,
+# който proxy-то попълва (ключ в request.META, напр. HTTP_X_FORWARDED_FOR), като
+# UNILINK_TRUSTED_PROXY_COUNT е броят на proxy-тата пред приложението. Без proxy да остане празно,
+# иначе клиентът може сам да подаде хедъра.
+UNILINK_TRUSTED_PROXY_HEADER = os.environ.get('UNILINK_TRUSTED_PROXY_HEADER', '')
+UNILINK_TRUSTED_PROXY_COUNT = env_int('UNILINK_TRUSTED_PROXY_COUNT', 1)
+
+# Email
+# https://docs.djangoproject.com/en/5.2/topics/email/
+# Известията се изпращат от командата send_notifications (unilink.notifications), не от заявките.
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = 'localhost'
+EMAIL_PORT = 25
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = 'UniLink <no-reply@unilink.bg>'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing (unilink.hashers)
+# Първият хешер е този за нови пароли; за Argon2 (изисква argon2-cffi) или scrypt го преместете най-отгоре.
+# Параметрите се избират с `tune_password_hashers --save` за целево време на машината.
+PASSWORD_HASHERS = [
+    'unilink.hashers.PBKDF2PasswordHasher',
+    'unilink.hashers.Argon2PasswordHasher',
+    'unilink.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+UNILINK_PASSWORD_HASH_PARAMS_FILE = BASE_DIR / 'password_hash_params.json'
+# Нишки за проверка на паролата при async вход; хеширането е CPU работа, затова не повече от ядрата.
+UNILINK_PASSWORD_CHECK_WORKERS = env_int('UNILINK_PASSWORD_CHECK_WORKERS', os.cpu_count() or 1)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -124,6 +292,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Качените от админа CSV файлове за импорт се четат от `run_jobs`, затова при няколко
+# машини MEDIA_ROOT трябва да е споделена директория (или STORAGES да сочи външно хранилище).
+MEDIA_ROOT = os.environ.get('UNILINK_MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
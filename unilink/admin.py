@@ -4,16 +4,113 @@ from django.contrib.auth import get_user_model
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
-import random
-import string
-from .models import Specialty, JobPosting, StudentApplication, LecturerApplication
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Trim
+import functools
+from contextlib import nullcontext
+import operator
+from .approvals import CredentialStore, credentials_csv
+from .exports import streaming_export_response
+from .imports import save_upload
+from .jobs import enqueue
+from .routers import replica_reads
+from .review_queue import (
+    QUEUE_STATUSES, approximate_count, claim_next, queue_page, queue_queryset, release,
+)
+from .search import search_applications
+from .stats import dashboard_stats
+from .models import (
+    Specialty, JobPosting, StudentApplication, LecturerApplication, Job, JobStatus, Outbox, OutboxStatus,
+    AdmissionStat,
+)
 
 User = get_user_model()
 
 
+class QueryBudgetAdmin(admin.ModelAdmin):
+    # Свързаните обекти се вземат с JOIN, а изчисляемите колони се анотират в SQL,
+    # за да може списъкът да се сортира по тях и да не прави заявка на ред.
+    # changelist_query_budget е горната граница на заявките за една страница; проверява се в unilink.tests.
+    list_annotations = {}
+    changelist_query_budget = None
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.list_annotations:
+            queryset = queryset.annotate(**self.list_annotations)
+        return queryset
+
+    def changelist_view(self, request, extra_context=None):
+        # Самият списък (GET) се чете от реплика (unilink.routers), действията (POST) – от основната база.
+        with replica_reads() if request.method == 'GET' else nullcontext():
+            return super().changelist_view(request, extra_context)
+
+
+class LookaheadPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class LookaheadPaginator(Paginator):
+    # Без COUNT(*) върху цялата таблица: взема един ред повече, за да разбере
+    # дали има следваща страница. Автодовършването използва само has_next().
+
+    def page(self, number):
+        number = int(number)
+        if number < 1:
+            raise EmptyPage(_('Номерът на страницата е по-малък от 1'))
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return LookaheadPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class PrefixAutocompleteMixin:
+    # Автодовършването (admin:autocomplete) търси по начало на индексирани полета и
+    # подрежда по уникален индекс, така че всяка страница е кратко обхождане на индекс,
+    # независимо от размера на таблицата. Списъкът с обекти не се променя.
+    autocomplete_search_fields = ()
+    autocomplete_ordering = ()
+
+    def is_autocomplete(self, request):
+        return getattr(request.resolver_match, 'url_name', None) == 'autocomplete'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.is_autocomplete(request):
+            return super().get_search_results(request, queryset, search_term)
+
+        queryset = queryset.order_by(*self.autocomplete_ordering)
+        term = search_term.strip()
+        if term:
+            queryset = queryset.filter(functools.reduce(operator.or_, [
+                Q(**{f'{field}__istartswith': term}) for field in self.autocomplete_search_fields
+            ]))
+        return queryset, False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if self.is_autocomplete(request):
+            return LookaheadPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+
+def applicant_full_name():
+    return Trim(Concat('user__first_name', Value(' '), 'user__last_name'))
+
+
 @admin.register(Specialty)
 class SpecialtyAdmin(admin.ModelAdmin):
-    list_display = ('name', 'is_active')
+    list_display = ('name', 'capacity', 'is_active')
+    list_editable = ('capacity',)
     list_filter = ('is_active',)
     search_fields = ('name',)
 
@@ -24,52 +121,305 @@ class JobPostingAdmin(admin.ModelAdmin):
     search_fields = ('title',)
 
 
+class FullTextSearchMixin:
+    # Търсенето минава през пълнотекстовия индекс (unilink.search) и се подрежда по
+    # релевантност; search_fields се използват само ако базата не го поддържа.
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+
+        results = search_applications(queryset, search_term)
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        return results, False
+
+
+class ReviewQueueMixin:
+    # Отделен изглед за рецензентите: keyset страниране, приблизителен брой и
+    # "вземи следващите N" без конкуренция между рецензентите (unilink.review_queue).
+
+    def get_urls(self):
+        urls = [
+            path('review-queue/', self.admin_site.admin_view(self.review_queue_view),
+                 name=f'{self.opts.app_label}_{self.opts.model_name}_review_queue'),
+        ]
+        return urls + super().get_urls()
+
+    def review_queue_view(self, request):
+        if not self.has_change_permission(request):
+            raise Http404
+
+        url = reverse(f'admin:{self.opts.app_label}_{self.opts.model_name}_review_queue')
+        if request.method == 'POST':
+            if request.POST.get('action') == 'release':
+                released = release(self.model, request.user, request.POST.getlist('pk'))
+                self.message_user(request, _(f'{released} кандидатури бяха върнати в опашката.'))
+            else:
+                try:
+                    count = int(request.POST.get('count') or 10)
+                except ValueError:
+                    count = 10
+                claimed = claim_next(self.model, request.user, count)
+                self.message_user(request, _(f'Взети за преглед: {claimed}.'))
+            return redirect(f'{url}?status=IN_REVIEW&mine=1')
+
+        status = request.GET.get('status')
+        if status not in QUEUE_STATUSES:
+            status = QUEUE_STATUSES[0]
+        mine = request.GET.get('mine') == '1'
+
+        with replica_reads():
+            queryset = queue_queryset(self.model, status, request.user if mine else None)
+            rows, next_cursor = queue_page(queryset, request.GET.get('after'))
+            count, approximate = approximate_count(queryset)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('Опашка за преглед'),
+            'opts': self.opts,
+            'rows': rows,
+            'status': status,
+            'statuses': [(value, label) for value, label in self.model.STATUS_CHOICES if value in QUEUE_STATUSES],
+            'mine': mine,
+            'count': count,
+            'approximate': approximate,
+            'next_cursor': next_cursor,
+            'is_first_page': not request.GET.get('after'),
+        }
+        return TemplateResponse(request, 'admin/unilink/review_queue.html', context)
+
+
+class JobActionMixin:
+    # Тежките действия се изпълняват от `run_jobs`, а не в HTTP заявката.
+
+    def enqueue_job(self, request, task, payload, **kwargs):
+        job = enqueue(task, payload, user=request.user, **kwargs)
+        self.message_user(request, format_html(
+            '{} <a href="{}">#{}</a>',
+            _('Задачата е добавена в опашката:'),
+            reverse('admin:unilink_job_change', args=[job.pk]),
+            job.pk,
+        ))
+        return job
+
+    def enqueue_status_change(self, request, queryset, status):
+        return self.enqueue_job(request, 'set_application_status', {
+            'model': self.model._meta.label,
+            'pks': list(queryset.values_list('pk', flat=True)),
+            'status': status,
+        })
+
+    @admin.action(description=_('Постави избраните кандидатури в обработка'))
+    def mark_in_review(self, request, queryset):
+        self.enqueue_status_change(request, queryset, 'IN_REVIEW')
+
+    @admin.action(description=_('Откажи избраните кандидатури'))
+    def mark_rejected(self, request, queryset):
+        self.enqueue_status_change(request, queryset, 'REJECTED')
+
+
+class ExportActionMixin:
+
+    @admin.action(description=_('Експорт на избраните (CSV)'))
+    def export_csv(self, request, queryset):
+        with replica_reads():
+            return streaming_export_response(queryset, 'csv')
+
+    @admin.action(description=_('Експорт на избраните (XLSX)'))
+    def export_xlsx(self, request, queryset):
+        with replica_reads():
+            return streaming_export_response(queryset, 'xlsx')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'updated_at')
+    list_filter = ('status', 'task')
+    list_select_related = ('created_by',)
+    # result може да съдържа генерирани пароли, затова не се показва.
+    exclude = ('result',)
+    readonly_fields = ('task', 'payload', 'status', 'progress', 'error', 'attempts',
+                       'max_attempts', 'run_after', 'locked_at', 'created_by', 'created_at', 'updated_at')
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_('Повтори избраните задачи'))
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=JobStatus.RUNNING).update(
+            status=JobStatus.QUEUED, attempts=0, progress=0, locked_at=None
+        )
+        self.message_user(request, _(f'{updated} задачи бяха върнати в опашката.'))
+
+
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'status', 'attempts', 'send_after', 'sent_at', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('recipient', 'dedupe_key')
+    readonly_fields = ('kind', 'dedupe_key', 'recipient', 'subject', 'body', 'status', 'attempts',
+                       'max_attempts', 'send_after', 'error', 'created_at', 'sent_at')
+    actions = ['retry_messages']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_('Изпрати отново избраните известия'))
+    def retry_messages(self, request, queryset):
+        updated = queryset.exclude(status=OutboxStatus.SENT).update(
+            status=OutboxStatus.PENDING, attempts=0, send_after=timezone.now()
+        )
+        self.message_user(request, _(f'{updated} известия бяха върнати за изпращане.'))
+
+
+@admin.register(AdmissionStat)
+class AdmissionStatAdmin(JobActionMixin, admin.ModelAdmin):
+    # Вместо списък с редове се показва таблото, построено от броячите (unilink.stats).
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise Http404
+
+        if request.method == 'POST' and request.user.is_superuser:
+            self.enqueue_job(request, 'rebuild_stats', {})
+            return redirect(request.path)
+
+        with replica_reads():
+            stats = dashboard_stats()
+        context = {
+            **self.admin_site.each_context(request),
+            **stats,
+            'opts': self.opts,
+            'title': _('Статистика на кандидатстването'),
+            'can_rebuild': request.user.is_superuser,
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, 'admin/unilink/admission_stats.html', context)
+
+
 @admin.register(StudentApplication)
-class StudentApplicationAdmin(admin.ModelAdmin):
+class StudentApplicationAdmin(ReviewQueueMixin, FullTextSearchMixin, JobActionMixin, ExportActionMixin,
+                              QueryBudgetAdmin):
     list_display = ('get_full_name', 'get_username', 'get_priority_1', 'status')
     list_filter = ('status', 'specialty_priority_1')
+    list_select_related = ('user', 'specialty_priority_1')
+    list_annotations = {'applicant_full_name': applicant_full_name()}
+    changelist_query_budget = 8
     search_fields = ('user__first_name', 'user__last_name', 'user__username', 'egn')
+    autocomplete_fields = ('user', 'specialty_priority_1', 'specialty_priority_2', 'specialty_priority_3',
+                           'admitted_specialty')
 
     # Групиране на полетата във формуляра за редактиране
     fieldsets = (
         (_('Основна Информация и Статус'), {
-            'fields': ('user', 'status', 'egn', 'date_of_birth', 'phone_number', 'address')
+            'fields': ('user', 'status', 'submitted_at', 'reviewer', 'claimed_at',
+                       'egn', 'date_of_birth', 'phone_number', 'address')
         }),
         (_('Академичен Профил'), {
             'fields': ('high_school', 'gpa', 'certificates')
         }),
         (_('Желани Специалности'), {
-            'fields': ('specialty_priority_1', 'specialty_priority_2', 'specialty_priority_3', 'motivation')
+            'fields': ('specialty_priority_1', 'specialty_priority_2', 'specialty_priority_3', 'motivation',
+                       'admitted_specialty')
         }),
         (_('Допълнителна Информация и Декларации'), {
             'fields': ('extra_info', 'consent_gdpr')
         }),
     )
 
-    readonly_fields = ('consent_gdpr',)
+    readonly_fields = ('consent_gdpr', 'submitted_at', 'reviewer', 'claimed_at')
+    actions = ['mark_in_review', 'mark_rejected', 'export_csv', 'export_xlsx']
 
     def get_full_name(self, obj):
-        return obj.user.get_full_name()
+        return obj.applicant_full_name
     get_full_name.short_description = _("Кандидат")
+    get_full_name.admin_order_field = 'applicant_full_name'
 
     def get_username(self, obj):
         return obj.user.username
     get_username.short_description = _("Потребителско Име")
+    get_username.admin_order_field = 'user__username'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view),
+                 name='unilink_studentapplication_import'),
+            path('import/<int:job_id>/', self.admin_site.admin_view(self.import_progress_view),
+                 name='unilink_studentapplication_import_progress'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise Http404
+
+        form = ApplicantImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            # Повторен опит би отхвърлил вече създадените редове, затова задачата е с един опит.
+            name = save_upload(form.cleaned_data['csv_file'])
+            job = self.enqueue_job(request, 'import_applicants', {'name': name}, max_attempts=1)
+            return redirect('admin:unilink_studentapplication_import_progress', job_id=job.pk)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('Импорт на кандидат-студенти'),
+            'opts': self.model._meta,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/unilink/studentapplication/import.html', context)
+
+    def import_progress_view(self, request, job_id):
+        if not self.has_add_permission(request):
+            raise Http404
+        try:
+            job = Job.objects.get(pk=job_id, task='import_applicants', created_by=request.user)
+        except Job.DoesNotExist:
+            raise Http404
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('Импорт на кандидат-студенти'),
+            'opts': self.model._meta,
+            'job': job,
+            'report': job.result if job.status == JobStatus.DONE else None,
+        }
+        return TemplateResponse(request, 'admin/unilink/studentapplication/import_progress.html', context)
 
     def get_priority_1(self, obj):
         return obj.specialty_priority_1
     get_priority_1.short_description = _("Първо Желание")
+    get_priority_1.admin_order_field = 'specialty_priority_1__name'
 
 
 @admin.register(LecturerApplication)
-class LecturerApplicationAdmin(admin.ModelAdmin):
+class LecturerApplicationAdmin(ReviewQueueMixin, FullTextSearchMixin, JobActionMixin, ExportActionMixin,
+                               QueryBudgetAdmin):
     list_display = ('get_full_name', 'applied_job', 'department', 'status')
     list_filter = ('status', 'applied_job')
+    list_select_related = ('user', 'applied_job')
+    list_annotations = {'applicant_full_name': applicant_full_name()}
+    changelist_query_budget = 8
     search_fields = ('user__first_name', 'user__last_name', 'applied_job__title', 'department')
+    autocomplete_fields = ('user', 'applied_job')
 
     fieldsets = (
         (_('Основна Информация и Статус'), {
-            'fields': ('user', 'status', 'applied_job', 'title', 'department')
+            'fields': ('user', 'status', 'submitted_at', 'reviewer', 'claimed_at',
+                       'applied_job', 'title', 'department')
         }),
         (_('Образование и Квалификации'), {
             'fields': ('education_path', 'certifications', 'memberships')
@@ -81,14 +431,25 @@ class LecturerApplicationAdmin(admin.ModelAdmin):
             'fields': ('document_notes', 'statement_of_truth')
         }),
     )
-    readonly_fields = ('statement_of_truth',)
+    readonly_fields = ('statement_of_truth', 'submitted_at', 'reviewer', 'claimed_at')
+    actions = ['mark_in_review', 'mark_rejected', 'export_csv', 'export_xlsx']
 
     def get_full_name(self, obj):
-        return obj.user.get_full_name()
+        return obj.applicant_full_name
     get_full_name.short_description = _("Кандидат")
+    get_full_name.admin_order_field = 'applicant_full_name'
 
 
 
+class ApplicantImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label=_("CSV файл"),
+        help_text=_("Колони: username, first_name, last_name, email, egn, date_of_birth, phone_number, address, "
+                    "high_school, gpa, certificates, specialty_priority_1..3 (име на специалност), "
+                    "motivation, extra_info.")
+    )
+
+
 class UserChangeForm(forms.ModelForm):
 
     class Meta:
@@ -97,29 +458,62 @@ class UserChangeForm(forms.ModelForm):
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(PrefixAutocompleteMixin, JobActionMixin, BaseUserAdmin):
     form = UserChangeForm
+    autocomplete_fields = ('applied_specialty', 'applied_job_posting')
+    autocomplete_search_fields = ('username', 'faculty_number', 'service_email')
+    autocomplete_ordering = ('username',)
 
     @admin.action(description=_('Одобряване на избрани потребители и генериране на нова парола'))
     def generate_password_action(self, request, queryset):
-        updated_count = 0
-
-        characters = string.ascii_letters + string.digits + "!@#$%^&*"
-        password_length = 12
-
-        for user in queryset:
-            new_password = ''.join(random.choice(characters) for i in range(password_length))
-            user.set_password(new_password)
-
-            user.is_approved = True
-            user.save()
-
-            updated_count += 1
-
-        self.message_user(request, _(f'{updated_count} потребители бяха одобрени и получиха нова парола.'))
+        user_ids = list(queryset.values_list('pk', flat=True))
+        job = self.enqueue_job(request, 'approve_users', {'user_ids': user_ids}, max_attempts=1)
+        return redirect('admin:unilink_user_approval', job_id=job.pk)
 
     actions = [generate_password_action]
 
+    def get_urls(self):
+        urls = [
+            path('approvals/<int:job_id>/', self.admin_site.admin_view(self.approval_view),
+                 name='unilink_user_approval'),
+            path('approvals/<int:job_id>/credentials.csv', self.admin_site.admin_view(self.approval_export_view),
+                 name='unilink_user_approval_export'),
+        ]
+        return urls + super().get_urls()
+
+    def get_approval_job(self, request, job_id):
+        if not self.has_change_permission(request):
+            raise Http404
+        try:
+            return Job.objects.get(pk=job_id, task='approve_users', created_by=request.user)
+        except Job.DoesNotExist:
+            raise Http404
+
+    def approval_view(self, request, job_id):
+        job = self.get_approval_job(request, job_id)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('Одобряване на потребители'),
+            'opts': self.model._meta,
+            'job': job,
+            'total': len(job.payload.get('user_ids', [])),
+            'has_export': CredentialStore(job.pk).exists(),
+            'export_url': reverse('admin:unilink_user_approval_export', args=[job.pk]),
+        }
+        return TemplateResponse(request, 'admin/unilink/user/approval_progress.html', context)
+
+    def approval_export_view(self, request, job_id):
+        job = self.get_approval_job(request, job_id)
+        # Паролите се изтриват от кеша при първото изтегляне.
+        credentials = CredentialStore(job.pk).pop()
+        if credentials is None:
+            raise Http404
+
+        response = HttpResponse(credentials_csv(credentials), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="credentials-{job.pk}.csv"'
+        return response
+
     def colored_is_approved(self, obj):
         if obj.is_approved:
             return format_html('<span style="color: green; font-weight: bold;">{}</span>', _('Одобрен'))
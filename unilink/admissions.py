@@ -0,0 +1,132 @@
+from array import array
+
+from django.db import transaction
+
+from .models import Specialty, StudentApplication
+from .stats import update_status
+
+# REJECTED (отказ от проверяващ) не участва; некласираните от предишно класиране – да.
+RANKING_STATUSES = ('SUBMITTED', 'IN_REVIEW', 'APPROVED', 'NOT_ADMITTED')
+LOAD_CHUNK_SIZE = 5000
+UPDATE_CHUNK_SIZE = 5000
+
+NO_SPECIALTY = 0
+# Ключ в резултата: кандидатури, чийто статус е сменен (отказ, взети за преглед) по време на класирането.
+SKIPPED = -1
+
+
+class Candidates:
+    # Компактно представяне на кандидатите: по един масив за колона вместо обект на ред.
+
+    def __init__(self):
+        self.pks = array('q')
+        self.gpas = array('H')  # успехът в стотни, 2.00 -> 200
+        self.priority_1 = array('q')
+        self.priority_2 = array('q')
+        self.priority_3 = array('q')
+        self.statuses = array('b')  # индекс в RANKING_STATUSES към момента на зареждането
+
+    def __len__(self):
+        return len(self.pks)
+
+    def append(self, pk, gpa, p1, p2, p3, status='SUBMITTED'):
+        self.pks.append(pk)
+        self.gpas.append(int(round(gpa * 100)))
+        self.priority_1.append(p1 or NO_SPECIALTY)
+        self.priority_2.append(p2 or NO_SPECIALTY)
+        self.priority_3.append(p3 or NO_SPECIALTY)
+        self.statuses.append(RANKING_STATUSES.index(status))
+
+
+def load_candidates():
+    candidates = Candidates()
+    rows = (
+        StudentApplication.objects.filter(status__in=RANKING_STATUSES)
+        .values_list('pk', 'gpa', 'specialty_priority_1_id', 'specialty_priority_2_id', 'specialty_priority_3_id',
+                     'status')
+        .iterator(chunk_size=LOAD_CHUNK_SIZE)
+    )
+    for row in rows:
+        candidates.append(*row)
+    return candidates
+
+
+def load_capacities():
+    capacities = dict(Specialty.objects.filter(is_active=True).values_list('pk', 'capacity'))
+
+    # Вече приетите (ACCEPTED) заемат място и не участват в класирането.
+    taken = (
+        StudentApplication.objects.filter(status='ACCEPTED', admitted_specialty__isnull=False)
+        .values_list('admitted_specialty_id', flat=True)
+        .iterator(chunk_size=LOAD_CHUNK_SIZE)
+    )
+    for specialty_id in taken:
+        if specialty_id in capacities:
+            capacities[specialty_id] -= 1
+    return capacities
+
+
+def allocate(candidates, capacities):
+    # Всички специалности подреждат кандидатите по един и същ критерий (успех),
+    # затова отложеното приемане (deferred acceptance) дава същия резултат като
+    # еднократно сортиране и обхождане: всеки кандидат, по низходящ успех, взема
+    # първото си желание със свободно място. Сложност O(n log n).
+    # При равен успех по-ранната кандидатура (по-малък pk) е с предимство.
+    remaining = {pk: max(0, capacity) for pk, capacity in capacities.items()}
+    admitted = array('q', bytes(8 * len(candidates)))
+
+    gpas, pks = candidates.gpas, candidates.pks
+    order = sorted(range(len(candidates)), key=lambda i: (-gpas[i], pks[i]))
+
+    for i in order:
+        for specialty_id in (candidates.priority_1[i], candidates.priority_2[i], candidates.priority_3[i]):
+            if remaining.get(specialty_id, 0) > 0:
+                remaining[specialty_id] -= 1
+                admitted[i] = specialty_id
+                break
+
+    return admitted
+
+
+def save_allocation(candidates, admitted):
+    # Кандидатите са заредени извън транзакцията. Всеки ред се променя само ако статусът
+    # му е същият като при зареждането, така че отказ или преглед, започнал междувременно,
+    # не се презаписва; местата на пропуснатите остават свободни до следващото класиране.
+    groups = {}
+    for pk, specialty_id, status in zip(candidates.pks, admitted, candidates.statuses):
+        groups.setdefault((specialty_id, RANKING_STATUSES[status]), []).append(pk)
+
+    summary = {}
+    with transaction.atomic():
+        for (specialty_id, from_status), pks in groups.items():
+            if specialty_id == NO_SPECIALTY:
+                status, values = 'NOT_ADMITTED', {'admitted_specialty': None}
+            else:
+                status, values = 'APPROVED', {'admitted_specialty_id': specialty_id}
+            updated = 0
+            for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+                # update() заобикаля сигналите; update_status мести броячите по статус.
+                # Класираните вече не са в опашката за преглед.
+                updated += update_status(
+                    StudentApplication.objects.filter(pk__in=pks[start:start + UPDATE_CHUNK_SIZE]),
+                    status, [from_status], reviewer=None, claimed_at=None, **values,
+                )
+            summary[specialty_id] = summary.get(specialty_id, 0) + updated
+            if updated < len(pks):
+                summary[SKIPPED] = summary.get(SKIPPED, 0) + len(pks) - updated
+
+    return summary
+
+
+def run_admission_ranking(dry_run=False):
+    candidates = load_candidates()
+    capacities = load_capacities()
+    admitted = allocate(candidates, capacities)
+
+    if dry_run:
+        summary = {}
+        for specialty_id in admitted:
+            summary[specialty_id] = summary.get(specialty_id, 0) + 1
+        return summary
+
+    return save_allocation(candidates, admitted)
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+
+from .models import StudentApplication
+from .notifications import queue_notifications
+
+User = get_user_model()
+
+
+class ApplicationSubmission:
+    # Регистрация + кандидатура в една стъпка: двете форми се валидират по веднъж,
+    # уникалността на потребителското име и ЕГН се проверява с една заявка, а
+    # User и кандидатурата се записват в една транзакция.
+
+    def __init__(self, user_form, application_form, role):
+        self.user_form = user_form
+        self.application_form = application_form
+        self.role = role
+        self.user_form.defer_unique_checks = True
+        self.application_form.defer_unique_checks = True
+
+    def is_valid(self):
+        # И двете форми се валидират, а уникалността се проверява и при невалидна форма
+        # (за полетата, които са минали валидация), за да се покажат всички грешки наведнъж.
+        user_valid = self.user_form.is_valid()
+        application_valid = self.application_form.is_valid()
+        conflicts = self.add_unique_errors()
+        return user_valid and application_valid and not conflicts
+
+    def unique_conflicts(self):
+        username = self.user_form.cleaned_data.get('username')
+        egn = self.application_form.cleaned_data.get('egn')
+
+        queries = []
+        if username:
+            queries.append(
+                User.objects.filter(username__iexact=username)
+                .annotate(conflict=Value('username')).values_list('conflict', flat=True)
+            )
+        if egn:
+            queries.append(
+                StudentApplication.objects.filter(egn=egn)
+                .annotate(conflict=Value('egn')).values_list('conflict', flat=True)
+            )
+        if not queries:
+            return set()
+        return set(queries[0].union(*queries[1:], all=True))
+
+    def add_unique_errors(self):
+        conflicts = self.unique_conflicts()
+        if 'username' in conflicts:
+            self.user_form.add_error(
+                'username', self.user_form.instance.unique_error_message(User, ['username'])
+            )
+        if 'egn' in conflicts:
+            self.application_form.add_error(
+                'egn', self.application_form.instance.unique_error_message(StudentApplication, ['egn'])
+            )
+        return conflicts
+
+    def save(self):
+        # Връща кандидатурата или None, ако паралелна заявка е заела името/ЕГН
+        # между проверката и записа; тогава грешките са добавени към формите.
+        try:
+            with transaction.atomic():
+                user = self.user_form.save(commit=False)
+                user.role = self.role
+                user.is_approved = False
+                user.save()
+
+                application = self.application_form.save(commit=False)
+                application.user = user
+                application.status = 'SUBMITTED'
+                application.save(force_insert=True)
+
+                queue_notifications('application_submitted', [user], event=application.pk)
+        except IntegrityError:
+            if not self.add_unique_errors():
+                raise
+            return None
+
+        return application
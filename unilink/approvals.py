@@ -0,0 +1,137 @@
+import csv
+import io
+import os
+import secrets
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import invalidate_user
+from .notifications import queue_notifications
+
+User = get_user_model()
+
+PASSWORD_CHARACTERS = string.ascii_letters + string.digits + "!@#$%^&*"
+PASSWORD_LENGTH = 12
+
+APPROVAL_CHUNK_SIZE = 500
+
+CREDENTIAL_FIELDS = ('username', 'first_name', 'last_name', 'faculty_number', 'service_email', 'password')
+CREDENTIALS_TIMEOUT = 60 * 60 * 24
+
+
+def generate_password():
+    return ''.join(secrets.choice(PASSWORD_CHARACTERS) for _ in range(PASSWORD_LENGTH))
+
+
+def _init_hasher():
+    # При spawn (macOS/Windows) дъщерният процес няма заредени настройки.
+    django.setup()
+
+
+class CredentialStore:
+    # Новите пароли в явен вид не влизат в базата (нито в unilink.Job): пазят се в
+    # споделения кеш по парчета, до първото изтегляне или до CREDENTIALS_TIMEOUT.
+
+    def __init__(self, job_id):
+        self.prefix = f'unilink:credentials:{job_id}'
+
+    def chunk_key(self, index):
+        return f'{self.prefix}:{index}'
+
+    @property
+    def count_key(self):
+        return f'{self.prefix}:chunks'
+
+    def add(self, credentials):
+        # Задачата се изпълнява от един работник, затова броячът не се пише паралелно.
+        index = cache.get(self.count_key, 0)
+        cache.set(self.chunk_key(index), credentials, CREDENTIALS_TIMEOUT)
+        cache.set(self.count_key, index + 1, CREDENTIALS_TIMEOUT)
+        return index
+
+    def remove(self, index):
+        cache.delete(self.chunk_key(index))
+
+    def exists(self):
+        return bool(cache.get(self.count_key))
+
+    def pop(self):
+        # Само заявката, която изтрие брояча, получава паролите.
+        count = cache.get(self.count_key)
+        if not count or not cache.delete(self.count_key):
+            return None
+        keys = [self.chunk_key(index) for index in range(count)]
+        chunks = cache.get_many(keys)
+        cache.delete_many(keys)
+        return [row for key in keys for row in chunks.get(key, [])]
+
+
+def approve_users(user_ids, event, progress=None, store=None, chunk_size=APPROVAL_CHUNK_SIZE, workers=None):
+    # PBKDF2 хеширането е CPU-bound, затова се разпределя между процеси,
+    # а записът е по един bulk_update на парче вместо UPDATE на всички колони за всеки потребител.
+    # event (задачата) отличава известията от различни одобрявания на същия потребител.
+    workers = workers or os.cpu_count() or 1
+    user_ids = list(user_ids)
+    total = len(user_ids)
+    approved = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hasher) as pool:
+        for start in range(0, total, chunk_size):
+            users = list(
+                User.objects.filter(pk__in=user_ids[start:start + chunk_size])
+                .only('pk', 'username', 'first_name', 'last_name', 'email', 'role', 'faculty_number', 'service_email')
+            )
+            passwords = [generate_password() for _ in users]
+            hashed = pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4)))
+
+            credentials = []
+            for user, password, encoded in zip(users, passwords, hashed):
+                user.password = encoded
+                user.previous_session_hash = ''
+                user.is_approved = True
+                credentials.append({
+                    'username': user.username,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'faculty_number': user.faculty_number or '',
+                    'service_email': user.service_email or '',
+                    'password': password,
+                })
+
+            saved = None
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_update(users, ['password', 'previous_session_hash', 'is_approved'])
+                    queue_notifications('account_approved', users, event)
+                    # Паролите на парчето се пазят преди COMMIT: при грешка в следващо парче
+                    # вече одобрените не остават без пароли, а при недостъпен кеш парчето се връща.
+                    if store is not None:
+                        saved = store.add(credentials)
+            except Exception:
+                if saved is not None:
+                    store.remove(saved)
+                raise
+            approved += len(users)
+
+            # bulk_update не изпраща post_save.
+            for user in users:
+                invalidate_user(user.pk)
+
+            if progress:
+                progress(min(start + chunk_size, total), total)
+
+    return approved
+
+
+def credentials_csv(credentials):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CREDENTIAL_FIELDS)
+    writer.writeheader()
+    writer.writerows(credentials)
+    return buffer.getvalue()
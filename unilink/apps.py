@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UnilinkConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'unilink'
+
+    def ready(self):
+        from . import checks, signals, tasks  # noqa: F401
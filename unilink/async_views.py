@@ -0,0 +1,105 @@
+from django.contrib import messages
+from django.contrib.auth import alogin, alogout
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.debug import sensitive_post_parameters
+from django.views.decorators.http import require_POST
+
+from .forms import CustomLoginForm
+from .page_cache import cache_anonymous_page
+from .views import LOGOUT_MESSAGE, is_lecturer, is_student, login_error
+
+# Async варианти на входа и таблата за ASGI (UNILINK_ASYNC_VIEWS, unilink.urls).
+# Връщат TemplateResponse: Django го рендерира в нишка, а не в цикъла на събитията.
+
+
+async def resolve_user(request):
+    # request.user се зарежда синхронно при първо четене; тук потребителят се взима с
+    # auser() и се записва обратно, за да го ползват шаблоните без заявка към базата.
+    request.user = await request.auser()
+    return request.user
+
+
+async def ais_student(user):
+    return is_student(user)
+
+
+async def ais_lecturer(user):
+    return is_lecturer(user)
+
+
+@login_required
+async def dashboard(request):
+    user = await resolve_user(request)
+    if user.is_student():
+        return redirect('unilink:student_dashboard')
+    elif user.is_lecturer():
+        return redirect('unilink:lecturer_dashboard')
+    else:
+        return TemplateResponse(request, 'unilink/generic_dashboard.html')
+
+
+@login_required
+@user_passes_test(ais_student)
+async def student_dashboard(request):
+    user = await resolve_user(request)
+    context = {
+        'title': 'Табло на Студента',
+        'id_info': user.faculty_number or "Няма факултетен номер"
+    }
+    return TemplateResponse(request, 'unilink/student_dashboard.html', context)
+
+
+@login_required
+@user_passes_test(ais_lecturer)
+async def lecturer_dashboard(request):
+    user = await resolve_user(request)
+    context = {
+        'title': 'Табло на Преподавателя',
+        'id_info': user.service_email or "Няма служебен имейл",
+    }
+    return TemplateResponse(request, 'unilink/lecturer_dashboard.html', context)
+
+
+@cache_anonymous_page
+async def application_choice(request):
+    user = await resolve_user(request)
+    if user.is_authenticated:
+        return redirect('unilink:dashboard')
+
+    context = {
+        'title': 'Избор на Кандидатстване',
+    }
+    return TemplateResponse(request, 'unilink/application_choice.html', context)
+
+
+@sensitive_post_parameters()
+@csrf_protect
+@never_cache
+async def login_view(request):
+    # Като CustomLoginView: при успех към таблото, при грешка формулярът с първата грешка.
+    if request.method != 'POST':
+        return TemplateResponse(request, 'unilink/login.html', {'form': CustomLoginForm(request)})
+
+    form = CustomLoginForm(request, data=request.POST)
+    if await form.ais_valid():
+        await alogin(request, form.get_user())
+        return redirect('unilink:dashboard')
+
+    return TemplateResponse(request, 'unilink/login.html', {
+        'form': form,
+        'error': login_error(form)
+    })
+
+
+@require_POST
+@csrf_protect
+@never_cache
+async def logout_view(request):
+    # Съобщението е в бисквитка (CookieStorage), затова оцелява след изчистването на сесията.
+    messages.success(request, LOGOUT_MESSAGE)
+    await alogout(request)
+    return redirect('unilink:login')
@@ -1,29 +1,100 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.db.models.functions import Lower
+
+from .cache import get_cached_user
+from .metrics import timed
+from .ratelimit import login_throttle_scope
 
 User = get_user_model()
 
 
+# Връща ('email' | 'faculty_number', нормализирана стойност) или (None, None).
+def normalize_identifier(identifier):
+    identifier = (identifier or '').strip()
+    if not identifier:
+        return None, None
+    if '@' in identifier:
+        return 'email', identifier.lower()
+    return 'faculty_number', identifier
+
+
 class CustomAuthBackend(BaseBackend):
 
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        identifier = username
+    def lookup_queryset(self, identifier):
+        # Всеки вид идентификатор минава през собствен индекс:
+        # факултетният номер през unique индекса, имейлът през LOWER(service_email).
+        kind, value = normalize_identifier(identifier)
 
-        try:
-            user = User.objects.get(
-                Q(service_email__iexact=identifier) | Q(faculty_number__exact=identifier)
+        if kind == 'email':
+            return User.objects.alias(service_email_lower=Lower('service_email')).filter(
+                service_email_lower=value
             )
+        if kind == 'faculty_number':
+            return User.objects.filter(faculty_number=value)
+        return None
+
+    def lookup_user(self, identifier):
+        queryset = self.lookup_queryset(identifier)
+        if queryset is None:
+            return None
+
+        # И двата идентификатора са уникални (unilink_user_email_lower_uniq),
+        # така че MultipleObjectsReturned е грешка в данните и не се поглъща.
+        try:
+            return queryset.get()
+        except User.DoesNotExist:
+            return None
+
+    async def alookup_user(self, identifier):
+        queryset = self.lookup_queryset(identifier)
+        if queryset is None:
+            return None
+
+        try:
+            return await queryset.aget()
         except User.DoesNotExist:
             return None
 
-        if user.check_password(password) and user.is_approved:
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        # PermissionDenied спира и следващите бекенди (ModelBackend), така че
+        # при изчерпан лимит не се прави нито заявка, нито хеширане.
+        if login_throttle_scope(request, username):
+            raise PermissionDenied
+
+        user = self.lookup_user(username)
+        if user is None:
+            return None
+
+        with timed('password_hash'):
+            password_ok = user.check_password(password)
+
+        if password_ok and user.is_approved:
             return user
 
         return None
 
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        # Същото като authenticate за async входа: търсенето е през async ORM,
+        # а паролата се проверява в ограничения пул (User.acheck_password).
+        if await sync_to_async(login_throttle_scope)(request, username):
+            raise PermissionDenied
+
+        user = await self.alookup_user(username)
+        if user is None:
             return None
+
+        with timed('password_hash'):
+            password_ok = await user.acheck_password(password)
+
+        if password_ok and user.is_approved:
+            return user
+
+        return None
+
+    def get_user(self, user_id):
+        # Извиква се на всяка заявка с вход: обикновено от кеша, а при пропуск от
+        # основната база (не от реплика, вж. get_cached_user).
+        return get_cached_user(user_id)
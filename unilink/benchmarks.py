@@ -0,0 +1,225 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .backends import CustomAuthBackend
+from .models import JobPosting, Role, Specialty
+
+User = get_user_model()
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class BenchmarkContext:
+
+    def __init__(self, iterations, host, password):
+        self.iterations = iterations
+        self.host = host
+        self.password = password
+
+    def client(self, user=None):
+        client = Client(HTTP_HOST=self.host)
+        if user is not None:
+            client.force_login(user, backend='unilink.backends.CustomAuthBackend')
+        return client
+
+    def sample_user(self, role, **filters):
+        return (
+            User.objects.filter(role=role, is_approved=True, **filters)
+            .order_by('pk')
+            .first()
+        )
+
+    def admin_user(self):
+        user, _ = User.objects.get_or_create(
+            username='benchmark_admin',
+            defaults={'is_staff': True, 'is_superuser': True, 'role': Role.ADMIN, 'is_approved': True},
+        )
+        return user
+
+
+def run_measured(func, iterations):
+    # Всяка итерация се измерва отделно; заявките се броят с CaptureQueriesContext.
+    timings = []
+    queries = []
+    for i in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+
+    return {
+        'n': iterations,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': round(statistics.mean(queries), 2),
+    }
+
+
+def rolled_back(func):
+    # POST сценариите създават редове; всяка итерация се връща назад.
+    def wrapper(i):
+        with transaction.atomic():
+            func(i)
+            transaction.set_rollback(True)
+    return wrapper
+
+
+@benchmark('auth.faculty_number')
+def bench_auth_faculty_number(ctx):
+    user = ctx.sample_user(Role.STUDENT, faculty_number__isnull=False)
+    backend = CustomAuthBackend()
+    return run_measured(
+        lambda i: backend.authenticate(None, username=user.faculty_number, password=ctx.password),
+        ctx.iterations,
+    )
+
+
+@benchmark('auth.service_email')
+def bench_auth_service_email(ctx):
+    user = ctx.sample_user(Role.LECTURER, service_email__isnull=False)
+    backend = CustomAuthBackend()
+    return run_measured(
+        lambda i: backend.authenticate(None, username=user.service_email.upper(), password=ctx.password),
+        ctx.iterations,
+    )
+
+
+def user_form_data(prefix, i):
+    return {
+        'username': f'benchmark_{prefix}_{i}',
+        'first_name': 'Бенчмарк',
+        'last_name': 'Тест',
+        'email': f'benchmark_{prefix}_{i}@mail.unilink.test',
+        'role': Role.STUDENT if prefix == 'student' else Role.LECTURER,
+        'password1': 'Bench-Apply-2025!',
+        'password2': 'Bench-Apply-2025!',
+    }
+
+
+@benchmark('apply.student')
+def bench_apply_student(ctx):
+    client = ctx.client()
+    url = reverse('unilink:student_apply')
+    specialties = list(Specialty.objects.filter(is_active=True).values_list('pk', flat=True)[:3])
+
+    def submit(i):
+        response = client.post(url, {
+            **user_form_data('student', i),
+            'egn': f'{8_000_000_000 + i}',
+            'date_of_birth': '2006-05-01',
+            'high_school': 'СУ „Бенчмарк“',
+            'gpa': '5.50',
+            'specialty_priority_1': specialties[0],
+            'motivation': 'Бенчмарк.',
+            'consent_gdpr': 'on',
+            'data_verified': 'on',
+        })
+        assert response.status_code == 302, response.status_code
+
+    return run_measured(rolled_back(submit), ctx.iterations)
+
+
+@benchmark('apply.lecturer')
+def bench_apply_lecturer(ctx):
+    client = ctx.client()
+    url = reverse('unilink:lecturer_apply')
+    job = JobPosting.objects.filter(is_open=True).values_list('pk', flat=True).first()
+
+    def submit(i):
+        response = client.post(url, {
+            **user_form_data('lecturer', i),
+            'education_path': 'Бенчмарк.',
+            'teaching_experience': 'Бенчмарк.',
+            'courses_taught': 'Бенчмарк.',
+            'research_publications': 'Бенчмарк.',
+            'applied_job': job,
+            'motivation_goals': 'Бенчмарк.',
+            'statement_of_truth': 'on',
+        })
+        assert response.status_code == 302, response.status_code
+
+    return run_measured(rolled_back(submit), ctx.iterations)
+
+
+def bench_get(ctx, url, user):
+    client = ctx.client(user)
+    client.get(url)  # загряване на кешовете
+
+    def get(i):
+        response = client.get(url)
+        assert response.status_code in (200, 302), response.status_code
+
+    return run_measured(get, ctx.iterations)
+
+
+@benchmark('dashboard.student')
+def bench_student_dashboard(ctx):
+    return bench_get(ctx, reverse('unilink:student_dashboard'), ctx.sample_user(Role.STUDENT))
+
+
+@benchmark('dashboard.lecturer')
+def bench_lecturer_dashboard(ctx):
+    return bench_get(ctx, reverse('unilink:lecturer_dashboard'), ctx.sample_user(Role.LECTURER))
+
+
+@benchmark('admin.studentapplication_changelist')
+def bench_student_changelist(ctx):
+    return bench_get(ctx, reverse('admin:unilink_studentapplication_changelist'), ctx.admin_user())
+
+
+@benchmark('admin.lecturerapplication_changelist')
+def bench_lecturer_changelist(ctx):
+    return bench_get(ctx, reverse('admin:unilink_lecturerapplication_changelist'), ctx.admin_user())
+
+
+@benchmark('admin.user_changelist')
+def bench_user_changelist(ctx):
+    return bench_get(ctx, reverse('admin:unilink_user_changelist'), ctx.admin_user())
+
+
+def run_benchmarks(ctx, names=None):
+    return {name: BENCHMARKS[name](ctx) for name in (names or BENCHMARKS)}
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    # Връща списък с регресии: по-бавен p95 над допустимото или повече заявки.
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append(f'{name}: заявки {previous["queries"]} -> {result["queries"]}')
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {previous["p95_ms"]}ms -> {result["p95_ms"]}ms')
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as baseline:
+        json.dump(results, baseline, indent=2, ensure_ascii=False, sort_keys=True)
@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import get_language
+
+from .models import JobPosting, Specialty
+
+User = get_user_model()
+
+# Увеличава се при промяна на DASHBOARD_USER_FIELDS, за да не се четат стари записи.
+USER_CACHE_SCHEMA = 2
+USER_CACHE_TIMEOUT = 60 * 15
+CHOICES_CACHE_TIMEOUT = 60 * 60
+
+# Полетата, които dashboard, student_dashboard, lecturer_dashboard и base.html
+# реално четат. password и previous_session_hash са нужни за проверката на session auth hash.
+DASHBOARD_USER_FIELDS = (
+    'id', 'password', 'previous_session_hash', 'username', 'first_name', 'last_name', 'email', 'role',
+    'is_approved', 'faculty_number', 'service_email',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+# Избори за падащите менюта във формулярите за кандидатстване: (queryset, поле за етикет).
+CHOICE_SOURCES = {
+    'specialty': (lambda: Specialty.objects.filter(is_active=True), 'name'),
+    'job_posting': (lambda: JobPosting.objects.filter(is_open=True), 'title'),
+}
+
+
+def _get_version(key):
+    return cache.get_or_set(key, time.time_ns, timeout=None)
+
+
+def _bump_version(key):
+    # Версията се сменя след COMMIT: иначе паралелно четене би кеширало стария
+    # (още видим) ред под новата версия.
+    transaction.on_commit(lambda: _incr_version(key))
+
+
+def _incr_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def _version_key(user_id):
+    return f'unilink:user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'unilink:user:{USER_CACHE_SCHEMA}:{user_id}:{version}'
+
+
+def get_cached_user(user_id):
+    # Версията се чете преди базата, така че запис, направен след паралелна
+    # инвалидация, остава под стара версия и никога не се прочита.
+    version = _get_version(_version_key(user_id))
+    key = _user_key(user_id, version)
+
+    user = cache.get(key)
+    if user is not None:
+        return user
+
+    # Пропускът се чете от основната база: ред от изоставаща реплика би останал в кеша
+    # под текущата версия до следващата инвалидация (т.е. стара парола или роля).
+    try:
+        user = User.objects.using(DEFAULT_DB_ALIAS).only(*DASHBOARD_USER_FIELDS).get(pk=user_id)
+    except User.DoesNotExist:
+        return None
+
+    cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id):
+    _bump_version(_version_key(user_id))
+
+
+def get_choices_version(source):
+    return _get_version(f'unilink:choices-version:{source}')
+
+
+def get_cached_choices(source):
+    key = f'unilink:choices:{source}:{get_choices_version(source)}'
+    choices = cache.get(key)
+    if choices is None:
+        queryset, label_field = CHOICE_SOURCES[source]
+        choices = list(queryset().values_list('pk', label_field))
+        cache.set(key, choices, CHOICES_CACHE_TIMEOUT)
+    return choices
+
+
+def invalidate_choices(source):
+    _bump_version(f'unilink:choices-version:{source}')
+
+
+def rendered_select_key(source, name, attrs):
+    attrs_hash = hashlib.md5(repr(sorted((attrs or {}).items())).encode()).hexdigest()
+    return f'unilink:select:{source}:{get_choices_version(source)}:{get_language()}:{name}:{attrs_hash}'
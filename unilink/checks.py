@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Инвалидациите и лимитите за вход разчитат на общ кеш за всички процеси.
+    return [
+        Warning(
+            f'Кешът "{alias}" е LocMemCache и не се споделя между процесите.',
+            hint='Задайте UNILINK_CACHE_URL (redis://... или memcached://...).',
+            id='unilink.W001',
+        )
+        for alias, config in settings.CACHES.items()
+        if config['BACKEND'] == LOCAL_CACHE_BACKEND
+    ]
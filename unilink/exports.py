@@ -0,0 +1,183 @@
+import csv
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import LecturerApplication, StudentApplication
+from .routers import for_reading
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (поле за values_list, заглавие на колоната). Имената на свързаните обекти
+# идват през JOIN в същата заявка, а не ред по ред.
+EXPORT_COLUMNS = {
+    StudentApplication: (
+        ('user__username', 'Потребителско име'),
+        ('user__first_name', 'Име'),
+        ('user__last_name', 'Фамилия'),
+        ('user__email', 'Имейл'),
+        ('egn', 'ЕГН/ЛНЧ'),
+        ('date_of_birth', 'Дата на раждане'),
+        ('phone_number', 'Телефон'),
+        ('high_school', 'Средно училище'),
+        ('gpa', 'Успех'),
+        ('specialty_priority_1__name', 'Първо желание'),
+        ('specialty_priority_2__name', 'Второ желание'),
+        ('specialty_priority_3__name', 'Трето желание'),
+        ('admitted_specialty__name', 'Класиран в'),
+        ('status', 'Статус'),
+    ),
+    LecturerApplication: (
+        ('user__username', 'Потребителско име'),
+        ('user__first_name', 'Име'),
+        ('user__last_name', 'Фамилия'),
+        ('user__email', 'Имейл'),
+        ('title', 'Титла/Степен'),
+        ('department', 'Факултет/Катедра'),
+        ('applied_job__title', 'Позиция'),
+        ('status', 'Статус'),
+    ),
+}
+
+
+# Текст, започващ с тези знаци, Excel и LibreOffice изпълняват като формула.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def spreadsheet_safe(value):
+    # Кандидатите сами попълват повечето полета; апостроф отпред ги показва като текст.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(queryset):
+    # iterator() чете на порции през server-side курсор. Зад PgBouncer
+    # (UNILINK_DB_PGBOUNCER) те са изключени и драйверът получава целия резултат
+    # наведнъж, така че паметта расте с броя на редовете.
+    columns = EXPORT_COLUMNS[queryset.model]
+    yield [title for _, title in columns]
+    yield from (
+        queryset.order_by('pk')
+        .values_list(*(field for field, _ in columns))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+class _Buffer:
+    # Обект с write(), чието съдържание се изпразва след всеки прочит.
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(c if isinstance(c, bytes) else c.encode('utf-8') for c in self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_csv(rows):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    # BOM, за да отвори Excel файла с правилното кодиране.
+    yield '\ufeff'.encode('utf-8')
+    for row in rows:
+        writer.writerow(['' if value is None else spreadsheet_safe(value) for value in row])
+        yield buffer.drain()
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+XML_INVALID_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = spreadsheet_safe(XML_INVALID_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def stream_xlsx(rows):
+    # Минимален XLSX (inline strings), записван ред по ред. zipfile поддържа
+    # изход без seek, така че паметта не зависи от броя на редовете.
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for row in rows:
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode('utf-8'))
+                yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def streaming_export_response(queryset, export_format):
+    stream, content_type = EXPORT_FORMATS[export_format]
+    filename = f'{queryset.model._meta.model_name}-{timezone.now():%Y%m%d-%H%M}.{export_format}'
+    # Редовете се четат след края на view-то, затова базата (реплика или основна) се избира сега.
+    response = StreamingHttpResponse(stream(export_rows(for_reading(queryset))), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,17 +1,88 @@
+from asgiref.sync import sync_to_async
 from django import forms
-from django.contrib.auth import get_user_model
+from django.contrib.auth import aauthenticate, get_user_model
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from django.core.cache import cache
+from django.forms.models import ModelChoiceIterator
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Fieldset, Submit, Field
+from .cache import CHOICES_CACHE_TIMEOUT, get_cached_choices, rendered_select_key
+from .ratelimit import login_throttle_scope
 from .models import Role, Specialty, JobPosting, StudentApplication, LecturerApplication
 import re
 
 User = get_user_model()
 
 
+# Правилата се използват и от формуляра, и от масовия импорт (unilink.imports).
+def validate_egn(egn):
+    if egn and not re.match(r'^\d{10}$', egn):
+        raise forms.ValidationError(_("ЕГН/ЛНЧ трябва да съдържа точно 10 цифри."))
 
-class CustomUserCreationForm(UserCreationForm):
+
+def validate_unique_priorities(*specialties):
+    selected_specialties = [s for s in specialties if s is not None]
+
+    if len(selected_specialties) != len(set(selected_specialties)):
+        raise forms.ValidationError(_("Специалностите в приоритетните желания трябва да бъдат уникални."))
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    # Изборите идват от общия кеш (unilink.cache), а не от заявка при всяко рендериране.
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from get_cached_choices(self.field.choices_source)
+
+    def __len__(self):
+        return len(get_cached_choices(self.field.choices_source)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(get_cached_choices(self.field.choices_source))
+
+
+class CachedSelect(forms.Select):
+    # Празното (непопълнено) падащо меню се рендерира веднъж за версия на изборите и език.
+
+    choices_source = None
+
+    def render(self, name, value, attrs=None, renderer=None):
+        if self.choices_source is None or value not in (None, ''):
+            return super().render(name, value, attrs, renderer)
+
+        key = rendered_select_key(self.choices_source, name, self.build_attrs(self.attrs, attrs))
+        html = cache.get(key)
+        if html is None:
+            html = super().render(name, value, attrs, renderer)
+            cache.set(key, str(html), CHOICES_CACHE_TIMEOUT)
+        return mark_safe(html)
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    # При POST валидацията все пак минава през queryset-а, за да не се приеме изтрит избор.
+    iterator = CachedModelChoiceIterator
+    widget = CachedSelect
+
+    def __init__(self, queryset, *, choices_source, **kwargs):
+        self.choices_source = choices_source
+        super().__init__(queryset, **kwargs)
+        self.widget.choices_source = choices_source
+
+
+class DeferredUniqueMixin:
+    # При defer_unique_checks формата не прави собствени заявки за уникалност;
+    # ApplicationSubmission ги проверява наведнъж (unilink.applications).
+    defer_unique_checks = False
+
+    def validate_unique(self):
+        if not self.defer_unique_checks:
+            super().validate_unique()
+
+
+class CustomUserCreationForm(DeferredUniqueMixin, UserCreationForm):
 
     role = forms.ChoiceField(
         choices=[(Role.STUDENT, _('Студент')), (Role.LECTURER, _('Преподавател'))],
@@ -26,8 +97,14 @@ class CustomUserCreationForm(UserCreationForm):
         model = User
         fields = ('first_name', 'last_name', 'email', 'role', 'username')
 
+    def clean_username(self):
+        if self.defer_unique_checks:
+            return self.cleaned_data.get('username')
+        return super().clean_username()
+
     def save(self, commit=True):
-        user = super().save(commit=False)
+        # Паролата се генерира при одобрение, затова въведената не се хешира.
+        user = forms.ModelForm.save(self, commit=False)
         user.is_approved = False
         user.set_unusable_password()
         if commit:
@@ -36,6 +113,8 @@ class CustomUserCreationForm(UserCreationForm):
 
 
 class CustomLoginForm(AuthenticationForm):
+    # При async вход (ais_valid) clean() не проверява паролата синхронно.
+    defer_authentication = False
 
     username = forms.CharField(
         max_length=254,
@@ -43,27 +122,61 @@ class CustomLoginForm(AuthenticationForm):
         widget=forms.TextInput(attrs={'autofocus': True})
     )
 
+    def clean(self):
+        if login_throttle_scope(self.request, self.cleaned_data.get('username')):
+            raise forms.ValidationError(
+                _("Твърде много неуспешни опити за вход. Опитайте отново по-късно."),
+                code='throttled',
+            )
+        if self.defer_authentication:
+            return self.cleaned_data
+        return super().clean()
+
+    async def ais_valid(self):
+        # Полетата и лимитът за опити се проверяват както в is_valid(), а потребителят и
+        # паролата – с aauthenticate (async ORM и ограничения пул за хеширане).
+        self.defer_authentication = True
+        if not await sync_to_async(self.is_valid)():
+            return False
+
+        self.user_cache = await aauthenticate(
+            self.request,
+            username=self.cleaned_data['username'],
+            password=self.cleaned_data['password'],
+        )
+        try:
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
+        except forms.ValidationError as error:
+            self.add_error(None, error)
+            return False
+        return True
+
 
 
 
-class StudentApplicationForm(forms.ModelForm):
+class StudentApplicationForm(DeferredUniqueMixin, forms.ModelForm):
 
     specialty_queryset = Specialty.objects.filter(is_active=True)
 
-    specialty_priority_1 = forms.ModelChoiceField(
+    specialty_priority_1 = CachedModelChoiceField(
         queryset=specialty_queryset,
+        choices_source='specialty',
         required=True,
         label=StudentApplication._meta.get_field('specialty_priority_1').verbose_name,
         empty_label=_("Избери първа специалност")
     )
-    specialty_priority_2 = forms.ModelChoiceField(
+    specialty_priority_2 = CachedModelChoiceField(
         queryset=specialty_queryset,
+        choices_source='specialty',
         required=False,
         label=StudentApplication._meta.get_field('specialty_priority_2').verbose_name,
         empty_label=_("Избери втора специалност (по избор)")
     )
-    specialty_priority_3 = forms.ModelChoiceField(
+    specialty_priority_3 = CachedModelChoiceField(
         queryset=specialty_queryset,
+        choices_source='specialty',
         required=False,
         label=StudentApplication._meta.get_field('specialty_priority_3').verbose_name,
         empty_label=_("Избери трета специалност (по избор)")
@@ -123,8 +236,7 @@ class StudentApplicationForm(forms.ModelForm):
 
     def clean_egn(self):
         egn = self.cleaned_data.get('egn')
-        if egn and not re.match(r'^\d{10}$', egn):
-            raise forms.ValidationError(_("ЕГН/ЛНЧ трябва да съдържа точно 10 цифри."))
+        validate_egn(egn)
         return egn
 
     def clean(self):
@@ -133,17 +245,15 @@ class StudentApplicationForm(forms.ModelForm):
         p2 = cleaned_data.get('specialty_priority_2')
         p3 = cleaned_data.get('specialty_priority_3')
 
-        selected_specialties = [s for s in [p1, p2, p3] if s is not None]
-
-        if len(selected_specialties) != len(set(selected_specialties)):
-            raise forms.ValidationError(_("Специалностите в приоритетните желания трябва да бъдат уникални."))
+        validate_unique_priorities(p1, p2, p3)
 
         return cleaned_data
 
 
-class LecturerApplicationForm(forms.ModelForm):
-    applied_job = forms.ModelChoiceField(
+class LecturerApplicationForm(DeferredUniqueMixin, forms.ModelForm):
+    applied_job = CachedModelChoiceField(
         queryset=JobPosting.objects.filter(is_open=True),
+        choices_source='job_posting',
         required=True,
         label=LecturerApplication._meta.get_field('applied_job').verbose_name,
         empty_label=_("Избери обява за работа")
@@ -0,0 +1,144 @@
+import asyncio
+import functools
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Долни граници, под които tune_password_hashers не слиза, дори да не постигне целевото време.
+MIN_HASH_PARAMS = {
+    'pbkdf2_sha256': {'iterations': 600_000},
+    'argon2': {'time_cost': 1, 'memory_cost': 47_104, 'parallelism': 1},
+    'scrypt': {'work_factor': 2 ** 14},
+}
+
+REHASH_WORKERS = 1
+REHASH_MAX_PENDING = 100
+
+
+@functools.cache
+def tuned_params():
+    # Параметрите, записани от tune_password_hashers --save; при липса важат тези на Django.
+    path = getattr(settings, 'UNILINK_PASSWORD_HASH_PARAMS_FILE', None)
+    if not path:
+        return {}
+    try:
+        with open(path, encoding='utf-8') as params:
+            return json.load(params)
+    except FileNotFoundError:
+        return {}
+
+
+def tuned(algorithm, name, default):
+    return tuned_params().get(algorithm, {}).get(name, default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return tuned(self.algorithm, 'iterations', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+
+    @property
+    def time_cost(self):
+        return tuned(self.algorithm, 'time_cost', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return tuned(self.algorithm, 'memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return tuned(self.algorithm, 'parallelism', hashers.Argon2PasswordHasher.parallelism)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+
+    @property
+    def work_factor(self):
+        return tuned(self.algorithm, 'work_factor', hashers.ScryptPasswordHasher.work_factor)
+
+    @property
+    def maxmem(self):
+        # OpenSSL отказва над 32 MiB по подразбиране, което спира work_factor над 2**14.
+        return 256 * self.work_factor * self.block_size * self.parallelism
+
+
+# Отложено прехеширане при вход. Паролата в явен вид не се записва никъде (нито в
+# unilink.Job, нито в кеша), затова прехеширането е във фонов поток на същия процес.
+_rehash_executor = None
+_rehash_pending = set()
+_rehash_lock = threading.Lock()
+
+
+def schedule_rehash(user, raw_password):
+    global _rehash_executor
+
+    with _rehash_lock:
+        if user.pk in _rehash_pending or len(_rehash_pending) >= REHASH_MAX_PENDING:
+            # При натоварване прехеширането се пропуска; ще се опита при следващия вход.
+            return
+        _rehash_pending.add(user.pk)
+        if _rehash_executor is None:
+            _rehash_executor = ThreadPoolExecutor(REHASH_WORKERS, thread_name_prefix='unilink-rehash')
+
+    transaction.on_commit(lambda: _rehash_executor.submit(rehash_password, user.pk, user.password, raw_password))
+
+
+def rehash_password(user_pk, old_encoded, raw_password):
+    from django.contrib.auth import get_user_model
+    from django.db import close_old_connections
+
+    from .cache import invalidate_user
+
+    User = get_user_model()
+    try:
+        encoded = hashers.make_password(raw_password)
+        # Ако паролата междувременно е сменена, новият хеш не се записва. Сесиите са
+        # подписани със стария хеш; User.get_session_auth_fallback_hash ги приема чрез
+        # previous_session_hash и ги прехвърля към новия. Пази се HMAC-ът, а не самият стар хеш.
+        updated = User.objects.filter(pk=user_pk, password=old_encoded).update(
+            password=encoded,
+            previous_session_hash=User(password=old_encoded).get_session_auth_hash(),
+        )
+        if updated:
+            invalidate_user(user_pk)
+    except Exception:
+        logger.exception('Неуспешно прехеширане на паролата на потребител %s', user_pk)
+    finally:
+        with _rehash_lock:
+            _rehash_pending.discard(user_pk)
+        close_old_connections()
+
+
+# Проверка на паролата при async вход (unilink.async_views). Хеширането държи процесора
+# стотици милисекунди, затова не е в цикъла на събитията, а в собствен пул с до
+# UNILINK_PASSWORD_CHECK_WORKERS нишки: излишните входове чакат на опашка, без да заемат
+# нишките, които sync_to_async ползва за заявките към базата.
+_check_executor = None
+_check_lock = threading.Lock()
+
+
+def password_check_executor():
+    global _check_executor
+
+    with _check_lock:
+        if _check_executor is None:
+            workers = getattr(settings, 'UNILINK_PASSWORD_CHECK_WORKERS', 1)
+            _check_executor = ThreadPoolExecutor(workers, thread_name_prefix='unilink-password')
+    return _check_executor
+
+
+async def acheck_user_password(user, raw_password):
+    # user.check_password не пише в базата: остарелият хеш се прехешира от schedule_rehash.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_check_executor(), user.check_password, raw_password)
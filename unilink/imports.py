@@ -0,0 +1,218 @@
+import csv
+import io
+import secrets
+
+from django import forms
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+
+from .forms import validate_egn, validate_unique_priorities
+from .models import Role, Specialty, StudentApplication
+from .search import index_applications
+from .stats import record_created
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 1000
+# Колко от отхвърлените редове се пазят в резултата на задачата (за страницата в админа).
+IMPORT_REPORT_ROWS = 500
+
+IMPORT_COLUMNS = (
+    'username', 'first_name', 'last_name', 'email',
+    'egn', 'date_of_birth', 'phone_number', 'address',
+    'high_school', 'gpa', 'certificates',
+    'specialty_priority_1', 'specialty_priority_2', 'specialty_priority_3',
+    'motivation', 'extra_info',
+)
+USER_FIELDS = frozenset({'username', 'first_name', 'last_name', 'email'})
+
+# Полетата на формулярите се създават веднъж и се преизползват за всеки ред,
+# което дава същото парсване и съобщения без цената на форма на ред.
+ROW_FIELDS = {
+    'username': forms.CharField(max_length=150, validators=[UnicodeUsernameValidator()]),
+    'first_name': forms.CharField(max_length=150),
+    'last_name': forms.CharField(max_length=150),
+    'email': forms.EmailField(),
+    'egn': forms.CharField(max_length=10),
+    'date_of_birth': forms.DateField(),
+    'phone_number': forms.CharField(max_length=20, required=False),
+    'address': forms.CharField(required=False),
+    'high_school': forms.CharField(max_length=255),
+    'gpa': forms.DecimalField(max_digits=3, decimal_places=2),
+    'certificates': forms.CharField(required=False),
+    'motivation': forms.CharField(),
+    'extra_info': forms.CharField(required=False),
+}
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.created = 0
+        self.rejected = []
+
+    def reject(self, line, row, errors):
+        self.rejected.append((line, row, errors))
+
+    def write_rejected(self, output):
+        writer = csv.writer(output)
+        writer.writerow(('line', 'errors') + IMPORT_COLUMNS)
+        for line, row, errors in self.rejected:
+            writer.writerow([line, '; '.join(errors)] + [row.get(column, '') for column in IMPORT_COLUMNS])
+
+
+class StudentApplicationImporter:
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.specialties = dict(Specialty.objects.filter(is_active=True).values_list('name', 'pk'))
+        self.seen_usernames = set()
+        self.seen_egns = set()
+        self.report = ImportReport()
+
+    def run(self, lines, progress=None):
+        batch = []
+        line = 1
+        for line, row in enumerate(csv.DictReader(lines), start=2):
+            try:
+                batch.append((line, row, self.clean_row(row)))
+            except forms.ValidationError as error:
+                self.report.reject(line, row, error.messages)
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.save_batch(batch)
+                batch = []
+                if progress:
+                    progress(line - 1)
+
+        if batch:
+            self.save_batch(batch)
+        if progress:
+            progress(line - 1)
+        return self.report
+
+    def clean_row(self, row):
+        cleaned = {}
+        errors = []
+        for name, field in ROW_FIELDS.items():
+            try:
+                cleaned[name] = field.clean((row.get(name) or '').strip())
+            except forms.ValidationError as error:
+                errors.extend(f'{name}: {message}' for message in error.messages)
+
+        priorities = []
+        for name in ('specialty_priority_1', 'specialty_priority_2', 'specialty_priority_3'):
+            specialty_name = (row.get(name) or '').strip()
+            if not specialty_name:
+                priorities.append(None)
+            elif specialty_name in self.specialties:
+                priorities.append(self.specialties[specialty_name])
+            else:
+                priorities.append(None)
+                errors.append(f'{name}: Непозната или неактивна специалност "{specialty_name}".')
+        if not (row.get('specialty_priority_1') or '').strip():
+            errors.append('specialty_priority_1: Това поле е задължително.')
+
+        for validator, args in ((validate_egn, (cleaned.get('egn'),)), (validate_unique_priorities, priorities)):
+            try:
+                validator(*args)
+            except forms.ValidationError as error:
+                errors.extend(error.messages)
+
+        # Потребителските имена се сравняват без значение на регистъра, както в CustomUserCreationForm.
+        if (cleaned.get('username') or '').upper() in self.seen_usernames:
+            errors.append('username: Повтаря се във файла.')
+        if cleaned.get('egn') in self.seen_egns:
+            errors.append('egn: Повтаря се във файла.')
+
+        if errors:
+            raise forms.ValidationError(errors)
+
+        self.seen_usernames.add(cleaned['username'].upper())
+        self.seen_egns.add(cleaned['egn'])
+        cleaned['specialty_priority_1_id'], cleaned['specialty_priority_2_id'], cleaned['specialty_priority_3_id'] = priorities
+        return cleaned
+
+    def save_batch(self, batch):
+        # Една заявка за проверка на заетите потребителски имена и ЕГН за целия пакет.
+        usernames = {cleaned['username'].upper() for _, _, cleaned in batch}
+        egns = {cleaned['egn'] for _, _, cleaned in batch}
+        # UPPER(username) съвпада с индекса unilink_user_username_prefix_idx (миграция 0011).
+        taken_usernames = set(
+            User.objects.annotate(username_upper=Upper('username'))
+            .filter(username_upper__in=usernames).values_list('username_upper', flat=True)
+        )
+        taken_egns = set(StudentApplication.objects.filter(egn__in=egns).values_list('egn', flat=True))
+
+        valid = []
+        for line, row, cleaned in batch:
+            errors = []
+            if cleaned['username'].upper() in taken_usernames:
+                errors.append('username: Потребител с това име вече съществува.')
+            if cleaned['egn'] in taken_egns:
+                errors.append('egn: Кандидатура с това ЕГН вече съществува.')
+            if errors:
+                self.report.reject(line, row, errors)
+            else:
+                valid.append((line, row, cleaned))
+
+        if not valid:
+            return
+
+        # Неизползваема парола, както при CustomUserCreationForm. token_urlsafe е
+        # значително по-бърз от make_password(None) при стотици хиляди редове.
+        users = [
+            User(
+                username=cleaned['username'],
+                first_name=cleaned['first_name'],
+                last_name=cleaned['last_name'],
+                email=cleaned['email'],
+                role=Role.STUDENT,
+                is_approved=False,
+                password=UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30),
+            )
+            for _, _, cleaned in valid
+        ]
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                applications = StudentApplication.objects.bulk_create([
+                    StudentApplication(
+                        user=user,
+                        **{name: value for name, value in cleaned.items() if name not in USER_FIELDS},
+                    )
+                    for user, (_, _, cleaned) in zip(users, valid)
+                ])
+                # bulk_create не изпраща post_save, затова индексът за търсене и статистиката се обновяват тук.
+                index_applications(StudentApplication, [user.pk for user in users])
+                record_created(StudentApplication, applications)
+        except IntegrityError as error:
+            for line, row, _ in valid:
+                self.report.reject(line, row, [f'Пакетът беше отхвърлен: {error}'])
+            return
+
+        self.report.created += len(valid)
+
+
+
+def save_upload(uploaded_file):
+    # Файлът се чете от `run_jobs`, а не в HTTP заявката (вж. import_stored_file).
+    return default_storage.save('unilink/imports/applicants.csv', uploaded_file)
+
+
+def import_stored_file(name, progress=None):
+    try:
+        with default_storage.open(name, 'rb') as file:
+            lines = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            total = sum(1 for _ in csv.reader(lines)) - 1
+            lines.seek(0)
+            report_progress = (lambda done: progress(done, total)) if progress else None
+            return StudentApplicationImporter().run(lines, progress=report_progress)
+    finally:
+        default_storage.delete(name)
@@ -0,0 +1,142 @@
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+RETRY_BACKOFF_SECONDS = 30
+# Докато задачата се изпълнява, updated_at се обновява на този интервал; по него
+# requeue_stale_jobs различава дълга задача от задача на спрял работник.
+HEARTBEAT_SECONDS = 60
+
+
+def register_task(name):
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(task, payload=None, user=None, max_attempts=3):
+    if task not in TASKS:
+        raise KeyError(f'Непозната задача: {task}')
+    return Job.objects.create(
+        task=task,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts,
+    )
+
+
+def set_progress(job, done, total):
+    job.progress = min(100, int(done * 100 / total)) if total else 100
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, updated_at=timezone.now())
+
+
+STALE_JOB_ERROR = 'Работникът спря по време на изпълнението.'
+
+
+def requeue_stale_jobs(stale_after):
+    # Задачи на спрял работник (без heartbeat за stale_after) се връщат в опашката, ако имат
+    # оставащи опити; останалите (напр. approve_users с max_attempts=1) се отбелязват като
+    # неуспешни. Върнатите в опашката преди тази проверка също не се изпълняват повторно.
+    now = timezone.now()
+    stale = Q(status=JobStatus.RUNNING, updated_at__lt=now - stale_after)
+    Job.objects.filter(stale | Q(status=JobStatus.QUEUED), attempts__gte=F('max_attempts')).update(
+        status=JobStatus.FAILED, locked_at=None, error=STALE_JOB_ERROR, updated_at=now
+    )
+    return Job.objects.filter(stale, attempts__lt=F('max_attempts')).update(
+        status=JobStatus.QUEUED, locked_at=None, updated_at=now
+    )
+
+
+def claim_next_job():
+    now = timezone.now()
+    with transaction.atomic():
+        # SKIP LOCKED позволява няколко работника без взаимно блокиране.
+        # SQLite игнорира FOR UPDATE, затова заемането се потвърждава и с условен UPDATE.
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=JobStatus.QUEUED, run_after__lte=now, attempts__lt=F('max_attempts'))
+            .order_by('run_after', 'pk')
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = Job.objects.filter(pk=job.pk, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, locked_at=now, attempts=job.attempts + 1, updated_at=now
+        )
+        if not claimed:
+            return None
+
+    job.refresh_from_db()
+    return job
+
+
+@contextmanager
+def heartbeat(job, interval=HEARTBEAT_SECONDS):
+    # Отделна нишка (със своя връзка с базата), за да се обновява и докато задачата
+    # е в една дълга заявка или не отчита прогрес.
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                Job.objects.filter(pk=job.pk, status=JobStatus.RUNNING).update(updated_at=timezone.now())
+        except Exception:
+            logger.exception('Heartbeat на задача #%s спря', job.pk)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'unilink-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    handler = TASKS.get(job.task)
+    try:
+        if handler is None:
+            raise KeyError(f'Непозната задача: {job.task}')
+        with heartbeat(job):
+            result = handler(job, **job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+        else:
+            job.status = JobStatus.FAILED
+        logger.exception('Задача %s #%s се провали (опит %s)', job.task, job.pk, job.attempts)
+    else:
+        job.status = JobStatus.DONE
+        job.progress = 100
+        job.result = result
+        job.error = ''
+        job.locked_at = None
+
+    job.save(update_fields=['status', 'progress', 'result', 'error', 'run_after', 'locked_at', 'updated_at'])
+    return job
+
+
+def run_next_job():
+    job = claim_next_job()
+    if job is None:
+        return None
+    return run_job(job)
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import resource
+import secrets
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from unilink.benchmarks import BenchmarkContext, percentile
+from unilink.management.commands.seed_unilink import SEED_PASSWORD
+from unilink.models import Role
+
+# Сървърите, които се сравняват: WSGI със синхронните изгледи и ASGI с async изгледите
+# (unilink.async_views). Стойностите в {} се попълват от опциите на командата.
+SERVERS = {
+    'sync': ['gunicorn', 'Uni_Link.wsgi:application', '--bind', '{host}:{port}', '--workers', '{workers}',
+             '--worker-class', 'gthread', '--threads', '{threads}', '--log-level', 'warning'],
+    'async': ['uvicorn', 'Uni_Link.asgi:application', '--host', '{host}', '--port', '{port}',
+              '--workers', '{workers}', '--log-level', 'warning', '--no-access-log'],
+}
+ASYNC_VIEWS = {'sync': '0', 'async': '1'}
+# Очакван отговор за всеки вид клиент; всичко друго се брои за грешка.
+EXPECTED_STATUS = {'dashboard': 200, 'login': 302}
+
+
+class HTTPConnection:
+    # Минимален HTTP/1.1 клиент с keep-alive върху asyncio, за да могат хиляди клиенти
+    # да работят в един процес без външни библиотеки.
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=(), body=b''):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}', f'Content-Length: {len(body)}', *headers]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Сървърът затвори връзката.')
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = ('Сравнява синхронния (WSGI, gunicorn) и async (ASGI, uvicorn) стек при много едновременни '
+            'клиенти: повечето отварят таблото на студент, част от тях влизат с парола (PBKDF2). '
+            'Сървърите се пускат локално от командата; изисква gunicorn и uvicorn.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=20.0, help='Секунди натоварване за всеки стек.')
+        parser.add_argument('--login-share', type=float, default=0.02,
+                            help='Част от клиентите, които правят само вход с парола.')
+        parser.add_argument('--stack', action='append', choices=list(SERVERS), dest='stacks',
+                            help='Стек за измерване (може да се повтаря; по подразбиране и двата).')
+        parser.add_argument('--workers', type=int, default=1, help='Процеси на сървъра.')
+        parser.add_argument('--threads', type=int, default=8, help='Нишки на процес за синхронния стек.')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=0, help='0 = свободен порт.')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Лимит за една заявка в секунди.')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+
+    def handle(self, *args, **options):
+        context = BenchmarkContext(options['clients'], options['host'], options['password'])
+        user = context.sample_user(Role.STUDENT, faculty_number__isnull=False)
+        if user is None:
+            raise CommandError('Няма одобрен студент; пуснете seed_unilink.')
+
+        # Сесията е в базата (и в кеша на този процес); сървърите я четат от базата.
+        session = context.client(user).cookies[settings.SESSION_COOKIE_NAME].value
+        csrf_token = secrets.token_hex(16)
+        self.dashboard_request = (
+            'GET', reverse('unilink:student_dashboard'),
+            [f'Cookie: {settings.SESSION_COOKIE_NAME}={session}'], b'',
+        )
+        self.login_request = (
+            'POST', reverse('unilink:login'),
+            [f'Cookie: {settings.CSRF_COOKIE_NAME}={csrf_token}',
+             'Content-Type: application/x-www-form-urlencoded'],
+            urlencode({'username': user.faculty_number, 'password': options['password'],
+                       'csrfmiddlewaretoken': csrf_token}).encode(),
+        )
+        self.raise_open_files_limit(options['clients'])
+
+        logins = round(options['clients'] * options['login_share'])
+        self.stdout.write(f'Клиенти: {options["clients"]} ({logins} с вход), {options["duration"]:.0f} s за стек')
+        self.stdout.write(f'{"Стек":<8}{"Заявка":<12}{"успешни":>10}{"грешки":>8}{"req/s":>10}'
+                          f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+
+        for stack in options['stacks'] or list(SERVERS):
+            port = options['port'] or self.free_port(options['host'])
+            server = self.start_server(stack, port, options)
+            try:
+                self.wait_until_ready(server, options['host'], port)
+                timings, errors = asyncio.run(self.load(options['host'], port, logins, options))
+            finally:
+                self.stop_server(server)
+
+            for kind in EXPECTED_STATUS:
+                values = [value * 1000 for value in timings[kind]]
+                if not values:
+                    self.stdout.write(f'{stack:<8}{kind:<12}{0:>10}{errors[kind]:>8}')
+                    continue
+                self.stdout.write(
+                    f'{stack:<8}{kind:<12}{len(values):>10}{errors[kind]:>8}'
+                    f'{len(values) / options["duration"]:>10.0f}{statistics.median(values):>10.1f}'
+                    f'{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}'
+                )
+
+    async def load(self, host, port, logins, options):
+        timings, errors = defaultdict(list), defaultdict(int)
+        clients = options['clients']
+        started = time.perf_counter()
+        deadline = started + options['duration']
+
+        async def client(index, kind):
+            # Клиентите тръгват разпределено в първата секунда, за да не препълнят опашката на сървъра.
+            await asyncio.sleep(index / clients)
+            connection = HTTPConnection(host, port)
+            method, path, headers, body = self.login_request if kind == 'login' else self.dashboard_request
+            try:
+                while time.perf_counter() < deadline:
+                    request_started = time.perf_counter()
+                    try:
+                        status = await asyncio.wait_for(
+                            connection.request(method, path, headers, body), options['timeout']
+                        )
+                    except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                        connection.close()
+                        errors[kind] += 1
+                        continue
+                    if status == EXPECTED_STATUS[kind]:
+                        timings[kind].append(time.perf_counter() - request_started)
+                    else:
+                        errors[kind] += 1
+            finally:
+                connection.close()
+
+        await asyncio.gather(*[
+            client(index, 'login' if index < logins else 'dashboard') for index in range(clients)
+        ])
+        return timings, errors
+
+    def start_server(self, stack, port, options):
+        command = [
+            part.format(host=options['host'], port=port, workers=options['workers'], threads=options['threads'])
+            for part in SERVERS[stack]
+        ]
+        if shutil.which(command[0]) is None:
+            raise CommandError(f'{command[0]} не е инсталиран (pip install {command[0]}).')
+
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'UNILINK_ASYNC_VIEWS': ASYNC_VIEWS[stack],
+            # Всички входове идват от един адрес и иначе бързо се спират от лимита по IP.
+            'UNILINK_LOGIN_THROTTLE': '0',
+        }
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, start_new_session=True)
+
+    def wait_until_ready(self, server, host, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Сървърът спря с код {server.returncode}.')
+            try:
+                with socket.create_connection((host, port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Сървърът не отговори за {timeout} s.')
+
+    def stop_server(self, server):
+        if server.poll() is not None:
+            return
+        os.killpg(server.pid, signal.SIGTERM)
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+            server.wait()
+
+    @staticmethod
+    def free_port(host):
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            return sock.getsockname()[1]
+
+    @staticmethod
+    def raise_open_files_limit(clients):
+        # Всеки клиент държи отворена връзка; лимитът по подразбиране (често 1024) не стига.
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = clients + 256
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (needed if hard == resource.RLIM_INFINITY else min(needed, hard), hard))
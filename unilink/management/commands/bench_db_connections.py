@@ -0,0 +1,111 @@
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+
+from unilink.benchmarks import BenchmarkContext, percentile
+from unilink.models import Role
+
+# Режимите, които се сравняват; 'new' е поведението без CONN_MAX_AGE и без пул.
+MODES = {
+    'new': {'conn_max_age': 0, 'health_checks': False, 'pool': None},
+    'persistent': {'conn_max_age': 60, 'health_checks': True, 'pool': None},
+    'pool': {'conn_max_age': 0, 'health_checks': True, 'pool': {'min_size': 1, 'max_size': 4}},
+}
+
+
+class Command(BaseCommand):
+    help = ('Измерва цената на връзката с базата за една заявка: пуска едни и същи заявки към таблото '
+            'през пълния WSGI цикъл (с request_started/request_finished) при нова връзка за всяка '
+            'заявка, постоянни връзки и пул. Изисква PostgreSQL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--url', default=None,
+                            help='По подразбиране таблото на студент (unilink:student_dashboard).')
+        parser.add_argument('--host', default='127.0.0.1',
+                            help='Стойност за Host хедъра (трябва да е в ALLOWED_HOSTS).')
+        parser.add_argument('--mode', action='append', choices=list(MODES), dest='modes',
+                            help='Режим за измерване (може да се повтаря; по подразбиране всички).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Сравнението има смисъл само срещу PostgreSQL.')
+
+        context = BenchmarkContext(options['requests'], options['host'], None)
+        user = context.sample_user(Role.STUDENT)
+        if user is None:
+            raise CommandError('Няма одобрен студент; пуснете seed_unilink.')
+        client = context.client(user)
+        environ = {
+            'PATH_INFO': options['url'] or reverse('unilink:student_dashboard'),
+            'HTTP_HOST': options['host'],
+            'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}',
+        }
+        setup_testing_defaults(environ)
+
+        backends = set()
+
+        def remember_backend(sender, connection, **kwargs):
+            if connection.alias == 'default':
+                backends.add(connection.connection.info.backend_pid)
+
+        original = {key: connection.settings_dict[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        original_pool = connection.settings_dict['OPTIONS'].get('pool')
+        handler = WSGIHandler()
+        connection_created.connect(remember_backend)
+
+        self.stdout.write(f'{"Режим":<12}{"p50 ms":>10}{"p95 ms":>10}{"req/s":>10}{"връзки":>10}')
+        try:
+            for name in options['modes'] or list(MODES):
+                self.configure(**MODES[name])
+                backends.clear()
+                timings = []
+                with override_settings(UNILINK_PAGE_CACHE=False):
+                    cache.clear()
+                    self.request(handler, environ)  # загряване
+                    for _ in range(options['requests']):
+                        started = time.perf_counter()
+                        status = self.request(handler, environ)
+                        timings.append((time.perf_counter() - started) * 1000)
+                if not status.startswith('200'):
+                    self.stderr.write(f'{environ["PATH_INFO"]}: HTTP {status}')
+                self.stdout.write(
+                    f'{name:<12}{statistics.median(timings):>10.2f}{percentile(timings, 95):>10.2f}'
+                    f'{len(timings) / (sum(timings) / 1000):>10.0f}{len(backends):>10}'
+                )
+        finally:
+            connection_created.disconnect(remember_backend)
+            self.configure(original['CONN_MAX_AGE'], original['CONN_HEALTH_CHECKS'], original_pool)
+
+    def configure(self, conn_max_age, health_checks, pool):
+        # Настройките се сменят на място; старата връзка и пулът се затварят, за да се
+        # отворят наново с новите стойности.
+        connection.close()
+        connection.close_pool()
+        connection.settings_dict.update(CONN_MAX_AGE=conn_max_age, CONN_HEALTH_CHECKS=health_checks)
+        connection.settings_dict['OPTIONS'].pop('pool', None)
+        if pool:
+            connection.settings_dict['OPTIONS']['pool'] = pool
+
+    def request(self, handler, environ):
+        # Пълният WSGI цикъл, за да се изпълнят close_old_connections в началото и края на заявката.
+        result = {}
+
+        def start_response(status, headers, exc_info=None):
+            result['status'] = status
+
+        response = handler(dict(environ), start_response)
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        return result['status']
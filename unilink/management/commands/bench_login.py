@@ -0,0 +1,112 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+
+from unilink.backends import CustomAuthBackend
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_login_'
+BENCH_PASSWORD = 'Bench-Login-2025!'
+
+
+class Command(BaseCommand):
+    help = 'Измерва латентността на CustomAuthBackend.authenticate върху голяма таблица с потребители.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500_000)
+        parser.add_argument('--lookups', type=int, default=2_000)
+        parser.add_argument('--logins', type=int, default=50,
+                            help='Брой пълни логини (с проверка на паролата).')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=2025)
+        parser.add_argument('--keep', action='store_true',
+                            help='Не изтривай генерираните потребители след измерването.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        total = options['users']
+
+        existing = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+        if existing < total:
+            self.seed_users(existing, total, options['batch_size'])
+
+        backend = CustomAuthBackend()
+        indexes = [rng.randrange(total) for _ in range(options['lookups'])]
+
+        self.stdout.write(f'Потребители в таблицата: {User.objects.count()}')
+        self.explain(self.email_for(indexes[0]).upper())
+
+        faculty = self.measure(lambda i: backend.lookup_user(self.faculty_number_for(i)), indexes)
+        email = self.measure(lambda i: backend.lookup_user(self.email_for(i).upper()), indexes)
+        self.report('Търсене по факултетен номер', faculty)
+        self.report('Търсене по служебен имейл', email)
+
+        logins = self.measure(
+            lambda i: backend.authenticate(None, username=self.email_for(i), password=BENCH_PASSWORD),
+            indexes[:options['logins']],
+        )
+        self.report('Пълен вход (търсене + check_password)', logins)
+
+        if not options['keep']:
+            with transaction.atomic():
+                User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+    def seed_users(self, start, total, batch_size):
+        self.stdout.write(f'Генериране на {total - start} потребители...')
+        password = make_password(BENCH_PASSWORD)
+        for offset in range(start, total, batch_size):
+            batch = [
+                User(
+                    username=f'{BENCH_PREFIX}{i}',
+                    password=password,
+                    first_name='Bench',
+                    last_name=str(i),
+                    faculty_number=self.faculty_number_for(i),
+                    service_email=self.email_for(i),
+                    is_approved=True,
+                )
+                for i in range(offset, min(offset + batch_size, total))
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(batch)
+
+    def explain(self, identifier):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE unilink_user')
+        queryset = User.objects.alias(service_email_lower=Lower('service_email')).filter(
+            service_email_lower=identifier.lower()
+        )
+        self.stdout.write('План за търсене по имейл:')
+        self.stdout.write(queryset.explain())
+
+    @staticmethod
+    def faculty_number_for(i):
+        return f'B{i:09d}'
+
+    @staticmethod
+    def email_for(i):
+        return f'{BENCH_PREFIX}{i}@unilink.test'
+
+    @staticmethod
+    def measure(func, indexes):
+        timings = []
+        for i in indexes:
+            started = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{label}: n={len(timings)} p50={statistics.median(timings):.3f}ms p95={p95:.3f}ms'
+        )
@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from unilink.metrics import registry
+from unilink.ratelimit import login_limiters
+
+
+class Command(BaseCommand):
+    help = ('Симулира атака с подбиране на пароли срещу последователни факултетни номера и сравнява '
+            'процесорното време на входа без и с ограничаване на опитите.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=300)
+        parser.add_argument('--identifiers', type=int, default=10,
+                            help='Брой атакувани факултетни номера (S000000000, S000000001, ...).')
+        parser.add_argument('--ips', type=int, default=5,
+                            help='Брой IP адреси, от които идват опитите.')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        attempts = options['attempts']
+        identifiers = [f'S{i:09d}' for i in range(options['identifiers'])]
+        ips = [f'203.0.113.{i + 1}' for i in range(options['ips'])]
+
+        def attack():
+            for i in range(attempts):
+                request = factory.post('/unilink/login/', REMOTE_ADDR=ips[i % len(ips)])
+                authenticate(request, username=identifiers[i % len(identifiers)], password=f'guess-{i}')
+
+        results = {}
+        for enabled in (False, True):
+            self.clear_counters(identifiers, ips)
+            with override_settings(UNILINK_LOGIN_THROTTLE=enabled):
+                cpu, wall = time.process_time(), time.perf_counter()
+                attack()
+                results[enabled] = (time.process_time() - cpu, time.perf_counter() - wall)
+        throttled = sum(
+            value for (name, _), value in registry.counters.items() if name == 'unilink_login_throttled_total'
+        )
+        self.clear_counters(identifiers, ips)
+
+        (cpu_off, wall_off), (cpu_on, wall_on) = results[False], results[True]
+        self.stdout.write(f'Опити: {attempts}, отхвърлени преди хеширане: {throttled}')
+        self.stdout.write(f'Без ограничение: CPU {cpu_off:.2f} s, време {wall_off:.2f} s')
+        self.stdout.write(f'С ограничение:   CPU {cpu_on:.2f} s, време {wall_on:.2f} s')
+        self.stdout.write(self.style.SUCCESS(f'Спестено процесорно време: {(1 - cpu_on / cpu_off) * 100:.0f}%'))
+
+    def clear_counters(self, identifiers, ips):
+        # Броячите от предишния режим не трябва да влияят на следващия. Трият се само
+        # ключовете на лимитера, а не целият (споделен) кеш.
+        limiters = login_limiters()
+        for identifier in identifiers:
+            limiters['identifier'].reset(identifier.lower())
+        for ip in ips:
+            limiters['ip'].reset(ip)
+        registry.reset()
@@ -0,0 +1,45 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+PAGES = (
+    'unilink:home',
+    'unilink:application_choice',
+    'unilink:registration_pending',
+    'unilink:student_apply',
+    'unilink:lecturer_apply',
+)
+
+
+class Command(BaseCommand):
+    help = 'Измерва заявки в секунда за анонимните страници без и с кеширане на страниците.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Брой заявки на страница за всеки режим.')
+        parser.add_argument('--host', default='127.0.0.1',
+                            help='Стойност за Host хедъра (трябва да е в ALLOWED_HOSTS).')
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=options['host'])
+        total = options['requests']
+
+        self.stdout.write(f'{"Страница":<32}{"без кеш (req/s)":>18}{"с кеш (req/s)":>18}')
+        for name in PAGES:
+            url = reverse(name)
+            results = []
+            for enabled in (False, True):
+                cache.clear()
+                with override_settings(UNILINK_PAGE_CACHE=enabled):
+                    client.get(url)  # загряване
+                    started = time.perf_counter()
+                    for _ in range(total):
+                        response = client.get(url)
+                    elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    self.stderr.write(f'{url}: HTTP {response.status_code}')
+                results.append(total / elapsed)
+            self.stdout.write(f'{url:<32}{results[0]:>18.0f}{results[1]:>18.0f}')
@@ -0,0 +1,51 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from unilink.admissions import Candidates, allocate
+
+
+class Command(BaseCommand):
+    help = 'Измерва класирането върху синтетични кандидати (без база данни).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applicants', type=int, default=50_000)
+        parser.add_argument('--specialties', type=int, default=40)
+        parser.add_argument('--seats', type=float, default=0.6,
+                            help='Общ брой места като част от броя кандидати.')
+        parser.add_argument('--seed', type=int, default=2025)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        specialty_ids = list(range(1, options['specialties'] + 1))
+        # Неравномерно търсене: първите специалности са по-желани.
+        weights = [1 / i for i in specialty_ids]
+
+        candidates = Candidates()
+        for pk in range(1, options['applicants'] + 1):
+            wishes = []
+            while len(wishes) < 3:
+                choice = rng.choices(specialty_ids, weights)[0]
+                if choice not in wishes:
+                    wishes.append(choice)
+            if rng.random() < 0.3:
+                wishes[2] = None
+            candidates.append(pk, round(rng.uniform(3.0, 6.0), 2), *wishes)
+
+        seats = int(options['applicants'] * options['seats'])
+        capacities = {sid: seats // len(specialty_ids) for sid in specialty_ids}
+
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            admitted = allocate(candidates, capacities)
+            timings.append(time.perf_counter() - started)
+
+        placed = sum(1 for specialty_id in admitted if specialty_id)
+        self.stdout.write(
+            f'Кандидати: {len(candidates)}, места: {sum(capacities.values())}, класирани: {placed}'
+        )
+        self.stdout.write(f'Класиране: най-добро {min(timings) * 1000:.1f}ms, '
+                          f'средно {sum(timings) / len(timings) * 1000:.1f}ms')
@@ -0,0 +1,79 @@
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from unilink.benchmarks import BenchmarkContext
+from unilink.management.commands.seed_unilink import SEED_PASSWORD
+from unilink.models import Role
+
+# 'before' е поведението по подразбиране на Django: сесии в базата, съобщения
+# първо в бисквитка, а при препълване в сесията.
+CONFIGS = {
+    'before': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'MESSAGE_STORAGE': 'django.contrib.messages.storage.fallback.FallbackStorage',
+    },
+    'after': {},
+}
+STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = ('Брои заявките към django_session за един типичен сценарий (вход, няколко отваряния на '
+            'таблото, изход) със сесии в базата и с текущите настройки (unilink.sessions).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', type=int, default=10, help='Брой отваряния на таблото след входа.')
+        parser.add_argument('--host', default='127.0.0.1',
+                            help='Стойност за Host хедъра (трябва да е в ALLOWED_HOSTS).')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+
+    def handle(self, *args, **options):
+        context = BenchmarkContext(options['views'], options['host'], options['password'])
+        user = context.sample_user(Role.STUDENT, faculty_number__isnull=False)
+        if user is None:
+            raise CommandError('Няма одобрен студент; пуснете seed_unilink.')
+
+        steps = [
+            ('GET вход', 'get', reverse('unilink:login'), None),
+            ('POST вход', 'post', reverse('unilink:login'),
+             {'username': user.faculty_number, 'password': options['password']}),
+            *[('GET табло', 'get', reverse('unilink:student_dashboard'), None)] * options['views'],
+            ('POST изход', 'post', reverse('unilink:logout'), None),
+            ('GET вход (съобщение)', 'get', reverse('unilink:login'), None),
+        ]
+
+        self.stdout.write(f'{"":<12}' + ''.join(f'{name:>8}' for name in STATEMENTS)
+                          + f'{"записи/заявка":>16}')
+        for name, overrides in CONFIGS.items():
+            with override_settings(UNILINK_PAGE_CACHE=False, **overrides):
+                counts, requests = self.run(context, steps)
+            writes = counts['INSERT'] + counts['UPDATE'] + counts['DELETE']
+            self.stdout.write(f'{name:<12}' + ''.join(f'{counts[kind]:>8}' for kind in STATEMENTS)
+                              + f'{writes / requests:>16.2f}')
+
+    def run(self, context, steps):
+        counts = Counter()
+
+        def count_session_queries(execute, sql, params, many, query_context):
+            if 'django_session' in sql:
+                counts[sql.lstrip().split(None, 1)[0].upper()] += 1
+            return execute(sql, params, many, query_context)
+
+        # Нов клиент (и нов SessionMiddleware) за всяка конфигурация; кешът се чисти,
+        # за да не се вземат сесии или ограничения за вход от предишния проход.
+        for backend in caches.all():
+            backend.clear()
+        client = context.client()
+        with connection.execute_wrapper(count_session_queries):
+            for label, method, url, data in steps:
+                response = getattr(client, method)(url, data)
+                if response.status_code >= 400 or (method == 'post' and response.status_code != 302):
+                    raise CommandError(f'{label}: HTTP {response.status_code}')
+        if '_auth_user_id' in client.session:
+            raise CommandError('Изходът не е изчистил сесията.')
+        return counts, len(steps)
@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from unilink.models import Role, Specialty, StudentApplication
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_submit_'
+
+
+class Command(BaseCommand):
+    help = ('Изпраща паралелни кандидатури за студент, като всяко потребителско име/ЕГН се подава '
+            'няколко пъти едновременно. Проверява, че точно една заявка печели, че няма потребители '
+            'без кандидатура, и отчита пропускателната способност.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applicants', type=int, default=200)
+        parser.add_argument('--duplicates', type=int, default=3,
+                            help='Колко пъти се подава всяка кандидатура едновременно.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--host', default='127.0.0.1',
+                            help='Стойност за Host хедъра (трябва да е в ALLOWED_HOSTS).')
+
+    def handle(self, *args, **options):
+        specialty = Specialty.objects.filter(is_active=True).values_list('pk', flat=True).first()
+        if specialty is None:
+            raise CommandError('Няма активна специалност; пуснете първо seed_unilink.')
+
+        self.cleanup()
+        url = reverse('unilink:student_apply')
+        host = options['host']
+
+        def submit(i):
+            client = Client(HTTP_HOST=host)
+            try:
+                response = client.post(url, {
+                    'username': f'{BENCH_PREFIX}{i}',
+                    'first_name': 'Паралелен',
+                    'last_name': 'Кандидат',
+                    'email': f'{BENCH_PREFIX}{i}@mail.unilink.test',
+                    'role': Role.STUDENT,
+                    'password1': 'Tq7-Parallel-Load!',
+                    'password2': 'Tq7-Parallel-Load!',
+                    'egn': f'{7_000_000_000 + i}',
+                    'date_of_birth': '2006-05-01',
+                    'high_school': 'СУ „Бенчмарк“',
+                    'gpa': '5.00',
+                    'specialty_priority_1': specialty,
+                    'motivation': 'Бенчмарк.',
+                    'consent_gdpr': 'on',
+                    'data_verified': 'on',
+                })
+                return response.status_code
+            finally:
+                connection.close()
+
+        work = [i for i in range(options['applicants']) for _ in range(options['duplicates'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            statuses = list(pool.map(submit, work))
+        elapsed = time.perf_counter() - started
+
+        created = statuses.count(302)
+        rejected = statuses.count(200)
+        users = User.objects.filter(username__startswith=BENCH_PREFIX)
+        orphans = users.filter(studentapplication__isnull=True).count()
+        applications = StudentApplication.objects.filter(user__username__startswith=BENCH_PREFIX).count()
+
+        self.stdout.write(
+            f'Заявки: {len(work)} за {elapsed:.2f} s ({len(work) / elapsed:.0f} req/s), '
+            f'създадени: {created}, отхвърлени като дубликати: {rejected}, '
+            f'други отговори: {len(work) - created - rejected}'
+        )
+        self.stdout.write(f'Кандидатури: {applications}, потребители без кандидатура: {orphans}')
+
+        self.cleanup()
+        if orphans or applications != options['applicants'] or created != options['applicants']:
+            raise CommandError('Очаквана е точно една записана кандидатура на кандидат и нито един осиротял потребител.')
+        self.stdout.write(self.style.SUCCESS('OK'))
+
+    def cleanup(self):
+        StudentApplication.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
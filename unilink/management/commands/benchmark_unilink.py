@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from unilink.benchmarks import (
+    BENCHMARKS, BenchmarkContext, compare_with_baseline, load_baseline, run_benchmarks, save_baseline,
+)
+from unilink.management.commands.seed_unilink import SEED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = ('Измерва вход, подаване на кандидатури, таблата и админ списъците: '
+            'брой заявки и p50/p95 латентност. Данните се генерират със seed_unilink.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Само тези измервания: {", ".join(BENCHMARKS)}')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--host', default='127.0.0.1',
+                            help='Стойност за Host хедъра (трябва да е в ALLOWED_HOSTS).')
+        parser.add_argument('--password', default=SEED_PASSWORD,
+                            help='Паролата на генерираните потребители.')
+        parser.add_argument('--save-baseline', metavar='PATH', help='Запиши резултатите като базова линия.')
+        parser.add_argument('--compare', metavar='PATH', help='Сравни с базова линия от файл.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимо влошаване на p95 спрямо базовата линия (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f'Непознати измервания: {", ".join(sorted(unknown))}')
+
+        ctx = BenchmarkContext(options['iterations'], options['host'], options['password'])
+        results = run_benchmarks(ctx, options['names'])
+
+        self.stdout.write(f'{"Измерване":<40}{"p50 (ms)":>12}{"p95 (ms)":>12}{"заявки":>10}')
+        for name, result in results.items():
+            self.stdout.write(f'{name:<40}{result["p50_ms"]:>12.2f}{result["p95_ms"]:>12.2f}{result["queries"]:>10}')
+
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], results)
+            self.stdout.write(f'Базовата линия е записана в {options["save_baseline"]}.')
+
+        if options['compare']:
+            regressions = compare_with_baseline(results, load_baseline(options['compare']), options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f'{len(regressions)} регресии спрямо {options["compare"]}.')
+            self.stdout.write(self.style.SUCCESS('Няма регресии спрямо базовата линия.'))
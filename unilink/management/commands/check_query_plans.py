@@ -0,0 +1,75 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models.functions import Lower
+
+from unilink.models import Job, JobPosting, JobStatus, LecturerApplication, Role, Specialty, StudentApplication
+
+User = get_user_model()
+
+ADMIN_PAGE_SIZE = 100
+
+# Postgres: "Seq Scan on unilink_user"; SQLite: "SCAN unilink_user" (без "USING ... INDEX").
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)'),
+}
+
+
+def canonical_queries():
+    specialty_id = Specialty.objects.values_list('pk', flat=True).first() or 0
+    job_id = JobPosting.objects.values_list('pk', flat=True).first() or 0
+
+    return {
+        'Вход с факултетен номер': User.objects.filter(faculty_number='F000000001'),
+        'Вход със служебен имейл': User.objects.alias(email_lower=Lower('service_email')).filter(
+            email_lower='someone@unilink.bg'
+        ),
+        'Чакащи одобрение потребители': User.objects.filter(is_approved=False).order_by('-date_joined')[:ADMIN_PAGE_SIZE],
+        'Одобрени преподаватели': User.objects.filter(role=Role.LECTURER, is_approved=True)[:ADMIN_PAGE_SIZE],
+        'Подадени кандидатури по специалност': StudentApplication.objects.filter(
+            status='SUBMITTED', specialty_priority_1_id=specialty_id
+        )[:ADMIN_PAGE_SIZE],
+        'Кандидатури в обработка': StudentApplication.objects.filter(status='IN_REVIEW')[:ADMIN_PAGE_SIZE],
+        'Кандидатури за позиция по статус': LecturerApplication.objects.filter(
+            status='SUBMITTED', applied_job_id=job_id
+        )[:ADMIN_PAGE_SIZE],
+        'Следваща фонова задача': Job.objects.filter(status=JobStatus.QUEUED).order_by('run_after', 'pk')[:1],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Изпълнява EXPLAIN върху основните заявки на проекта и завършва с грешка, '
+            'ако някоя от тях чете цялата таблица. Пускайте върху голям набор от данни.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Обнови статистиките (ANALYZE) преди проверката.')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Покажи целия план на всяка заявка.')
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Не се поддържа база данни от тип {connection.vendor}.')
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        failures = []
+        for label, queryset in canonical_queries().items():
+            plan = queryset.explain()
+            scans = pattern.findall(plan)
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'SEQ SCAN  {label} ({", ".join(sorted(set(scans)))})'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK        {label}'))
+            if options['verbose_plans'] or scans:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} заявки четат цялата таблица: {", ".join(failures)}')
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from unilink.exports import EXPORT_FORMATS, export_rows
+from unilink.models import LecturerApplication, StudentApplication
+from unilink.routers import for_reading, replica_reads
+
+MODELS = {
+    'student': StudentApplication,
+    'lecturer': LecturerApplication,
+}
+
+
+class Command(BaseCommand):
+    help = 'Експортира всички кандидатури в CSV или XLSX, без да ги зарежда наведнъж в паметта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=MODELS)
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--status', action='append',
+                            help='Само кандидатури с този статус (може да се повтаря).')
+        parser.add_argument('--output', '-o', help='Път до файла. По подразбиране stdout.')
+
+    def handle(self, *args, **options):
+        queryset = MODELS[options['kind']].objects.all()
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+
+        with replica_reads():
+            queryset = for_reading(queryset)
+
+        stream, _ = EXPORT_FORMATS[options['format']]
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in stream(export_rows(queryset)):
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from unilink.imports import IMPORT_BATCH_SIZE, StudentApplicationImporter
+
+
+class Command(BaseCommand):
+    help = 'Импортира кандидат-студенти от CSV файл (офлайн формуляри, партньорски училища).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--report', help='CSV файл, в който да се запишат отхвърлените редове.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as lines:
+                report = StudentApplicationImporter(batch_size=options['batch_size']).run(lines)
+        except OSError as error:
+            raise CommandError(error)
+
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as output:
+                report.write_rejected(output)
+        else:
+            for line, _, errors in report.rejected:
+                self.stderr.write(f'Ред {line}: {"; ".join(errors)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Създадени кандидатури: {report.created}, отхвърлени редове: {len(report.rejected)} '
+            f'({time.perf_counter() - started:.1f}s)'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Изтрива изтеклите сесии на порции (по индекса expire_date), за да не държи дълги заключвания '
+            'като clearsessions. Кешираните копия изтичат сами със същия срок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Пауза между порциите в секунди, за да не се натоварва базата.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()[0]
+            self.stdout.write(f'Изтрити: {deleted}')
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Изтрити изтекли сесии: {deleted}.'))
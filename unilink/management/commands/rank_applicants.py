@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from unilink.admissions import NO_SPECIALTY, SKIPPED, run_admission_ranking
+from unilink.models import Specialty
+
+
+class Command(BaseCommand):
+    help = 'Класира кандидат-студентите по успех и желания според броя места в специалностите.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Само покажи резултата, без да променяш статусите.')
+
+    def handle(self, *args, **options):
+        summary = run_admission_ranking(dry_run=options['dry_run'])
+        names = dict(Specialty.objects.values_list('pk', 'name'))
+
+        for specialty_id, count in sorted(summary.items(), key=lambda item: -item[1]):
+            if specialty_id in (NO_SPECIALTY, SKIPPED):
+                continue
+            self.stdout.write(f'{names.get(specialty_id, specialty_id)}: {count}')
+        self.stdout.write(f'Некласирани: {summary.get(NO_SPECIALTY, 0)}')
+        if summary.get(SKIPPED):
+            self.stdout.write(self.style.WARNING(
+                f'Пропуснати (статусът им е сменен по време на класирането): {summary[SKIPPED]}'
+            ))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробно класиране – статусите не са променени.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Класирането е записано.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from unilink.models import LecturerApplication, StudentApplication
+from unilink.search import index_applications
+
+MODELS = {
+    'student': StudentApplication,
+    'lecturer': LecturerApplication,
+}
+
+
+class Command(BaseCommand):
+    help = 'Преизгражда индекса за пълнотекстово търсене по кандидатурите (след миграция или масови промени).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', nargs='*', choices=sorted(MODELS), help='По подразбиране и двата вида.')
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or sorted(MODELS):
+            indexed = index_applications(MODELS[kind])
+            self.stdout.write(f'{kind}: индексирани {indexed} кандидатури.')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from unilink.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = ('Преизчислява броячите за таблото със статистики от кандидатурите и поправя разминаванията '
+            '(след миграция, ръчни промени в базата или масови операции). Пуска се периодично, напр. от cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Само показва разминаванията.')
+
+    def handle(self, *args, **options):
+        drift = rebuild_stats(dry_run=options['dry_run'])
+        for (dimension, key), (count, total), (actual_count, actual_total) in drift:
+            self.stdout.write(f'{dimension}:{key}: {count} ({total}) -> {actual_count} ({actual_total})')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Броячите съвпадат с данните.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Разминавания: {len(drift)} (нищо не е променено).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Поправени разминавания: {len(drift)}.'))
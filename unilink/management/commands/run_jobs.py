@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from unilink.jobs import HEARTBEAT_SECONDS, requeue_stale_jobs, run_next_job
+
+
+class Command(BaseCommand):
+    help = 'Изпълнява фоновите задачи от опашката unilink.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Изпълни наличните задачи и спри.')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Пауза в секунди, когато опашката е празна.')
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help='Спри след толкова задачи (0 = без ограничение).')
+        parser.add_argument('--stale-after', type=int, default=5 * HEARTBEAT_SECONDS,
+                            help='Секунди без heartbeat, след които задача в изпълнение се счита за изоставена.')
+
+    def handle(self, *args, **options):
+        processed = 0
+        stale_after = timedelta(seconds=options['stale_after'])
+
+        while True:
+            close_old_connections()
+            requeue_stale_jobs(stale_after)
+
+            job = run_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            processed += 1
+            self.stdout.write(f'{job} – опит {job.attempts}/{job.max_attempts}')
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Изпълнени задачи: {processed}'))
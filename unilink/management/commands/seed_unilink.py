@@ -0,0 +1,169 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from unilink.models import JobPosting, LecturerApplication, Role, Specialty, StudentApplication
+from unilink.search import index_applications
+from unilink.stats import record_created
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'Seed-UniLink-2025!'
+
+STUDENT_STATUSES = (('SUBMITTED', 50), ('IN_REVIEW', 25), ('APPROVED', 10), ('ACCEPTED', 5), ('REJECTED', 10))
+LECTURER_STATUSES = (('SUBMITTED', 45), ('IN_REVIEW', 25), ('INTERVIEW', 10), ('APPROVED', 10), ('REJECTED', 10))
+
+
+class Command(BaseCommand):
+    help = 'Генерира голям детерминиран набор от потребители, специалности и кандидатури за измервания.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=300_000)
+        parser.add_argument('--lecturers', type=int, default=20_000)
+        parser.add_argument('--specialties', type=int, default=80)
+        parser.add_argument('--job-postings', type=int, default=200)
+        parser.add_argument('--application-ratio', type=float, default=0.8,
+                            help='Част от студентите, които имат кандидатура.')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=2025)
+        parser.add_argument('--clear', action='store_true',
+                            help='Изтрий предишно генерираните данни преди генерирането.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.password = make_password(SEED_PASSWORD)
+        self.now = timezone.now()
+
+        if options['clear']:
+            self.clear()
+
+        specialty_ids = self.seed_specialties(options['specialties'])
+        job_ids = self.seed_job_postings(options['job_postings'])
+        self.seed_students(options['students'], options['application_ratio'], specialty_ids)
+        self.seed_lecturers(options['lecturers'], job_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Потребители: {User.objects.count()}, студентски кандидатури: {StudentApplication.objects.count()}, '
+            f'преподавателски кандидатури: {LecturerApplication.objects.count()}'
+        ))
+
+    def clear(self):
+        with transaction.atomic():
+            StudentApplication.objects.filter(user__username__startswith=SEED_PREFIX).delete()
+            LecturerApplication.objects.filter(user__username__startswith=SEED_PREFIX).delete()
+            User.objects.filter(username__startswith=SEED_PREFIX).delete()
+            Specialty.objects.filter(name__startswith='Seed ').delete()
+            JobPosting.objects.filter(title__startswith='Seed ').delete()
+
+    def seed_specialties(self, count):
+        existing = set(Specialty.objects.filter(name__startswith='Seed ').values_list('name', flat=True))
+        Specialty.objects.bulk_create([
+            Specialty(name=f'Seed Специалност {i:03d}', capacity=self.rng.randint(50, 400))
+            for i in range(count)
+            if f'Seed Специалност {i:03d}' not in existing
+        ])
+        return list(Specialty.objects.filter(name__startswith='Seed ').values_list('pk', flat=True))
+
+    def seed_job_postings(self, count):
+        if not JobPosting.objects.filter(title__startswith='Seed ').exists():
+            JobPosting.objects.bulk_create([
+                JobPosting(title=f'Seed Позиция {i:03d}', description='Генерирана обява.',
+                           is_open=self.rng.random() < 0.8)
+                for i in range(count)
+            ])
+        return list(JobPosting.objects.filter(title__startswith='Seed ').values_list('pk', flat=True))
+
+    def weighted_status(self, statuses):
+        return self.rng.choices([status for status, _ in statuses], [weight for _, weight in statuses])[0]
+
+    def new_user(self, username, role, **fields):
+        return User(
+            username=username,
+            password=self.password,
+            first_name=self.rng.choice(('Иван', 'Мария', 'Георги', 'Елена', 'Петър', 'Десислава')),
+            last_name=self.rng.choice(('Иванов', 'Петрова', 'Георгиев', 'Димитрова', 'Николов')),
+            email=f'{username}@mail.unilink.test',
+            role=role,
+            is_approved=self.rng.random() < 0.6,
+            date_joined=self.now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 90)),
+            **fields,
+        )
+
+    def seed_students(self, count, application_ratio, specialty_ids):
+        start = User.objects.filter(username__startswith=f'{SEED_PREFIX}s').count()
+        # По-малките номера на специалности са по-желани, за да има конкуренция.
+        weights = [1 / (i + 1) for i in range(len(specialty_ids))]
+
+        for offset in range(start, count, self.batch_size):
+            indexes = range(offset, min(offset + self.batch_size, count))
+            users = [
+                self.new_user(f'{SEED_PREFIX}s{i}', Role.STUDENT, faculty_number=f'S{i:09d}')
+                for i in indexes
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                applications = []
+                for i, user in zip(indexes, users):
+                    if self.rng.random() >= application_ratio:
+                        continue
+                    priorities = set()
+                    while len(priorities) < min(3, len(specialty_ids)):
+                        priorities.add(self.rng.choices(specialty_ids, weights)[0])
+                    priorities = list(priorities) + [None] * (3 - len(priorities))
+                    applications.append(StudentApplication(
+                        user=user,
+                        egn=f'{9_000_000_000 + i}',
+                        high_school='СУ „Генерирано“',
+                        gpa=Decimal(self.rng.randint(300, 600)) / 100,
+                        specialty_priority_1_id=priorities[0],
+                        specialty_priority_2_id=priorities[1],
+                        specialty_priority_3_id=priorities[2],
+                        motivation='Генерирана мотивация.',
+                        consent_gdpr=True,
+                        status=self.weighted_status(STUDENT_STATUSES),
+                        submitted_at=user.date_joined,
+                    ))
+                StudentApplication.objects.bulk_create(applications)
+                index_applications(StudentApplication, [application.pk for application in applications])
+                record_created(StudentApplication, applications)
+            self.stdout.write(f'Студенти: {indexes.stop}/{count}')
+
+    def seed_lecturers(self, count, job_ids):
+        start = User.objects.filter(username__startswith=f'{SEED_PREFIX}l').count()
+
+        for offset in range(start, count, self.batch_size):
+            indexes = range(offset, min(offset + self.batch_size, count))
+            users = [
+                self.new_user(f'{SEED_PREFIX}l{i}', Role.LECTURER, service_email=f'{SEED_PREFIX}l{i}@unilink.test')
+                for i in indexes
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                applications = LecturerApplication.objects.bulk_create([
+                    LecturerApplication(
+                        user=user,
+                        title=self.rng.choice(('', 'д-р', 'доц. д-р', 'проф. д-р')),
+                        department=f'Катедра {self.rng.randint(1, 40)}',
+                        education_path='Генериран образователен път.',
+                        teaching_experience='Генериран стаж.',
+                        courses_taught='Генерирани курсове.',
+                        research_publications='Генерирани публикации.',
+                        applied_job_id=self.rng.choice(job_ids),
+                        motivation_goals='Генерирана мотивация.',
+                        statement_of_truth=True,
+                        status=self.weighted_status(LECTURER_STATUSES),
+                        submitted_at=user.date_joined,
+                    )
+                    for user in users
+                ])
+                index_applications(LecturerApplication, [user.pk for user in users])
+                record_created(LecturerApplication, applications)
+            self.stdout.write(f'Преподаватели: {indexes.stop}/{count}')
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from unilink.models import OutboxStatus
+from unilink.notifications import OUTBOX_BATCH_SIZE, dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = 'Изпраща чакащите известия от unilink.Outbox на партиди през една SMTP връзка.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Изпрати наличните известия и спри.')
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help='Пауза в секунди, когато няма чакащи известия.')
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+
+        while True:
+            close_old_connections()
+
+            messages = dispatch_outbox(options['batch_size'])
+            if not messages:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            batch_sent = sum(message.status == OutboxStatus.SENT for message in messages)
+            sent += batch_sent
+            failed += len(messages) - batch_sent
+            self.stdout.write(f'Партида от {len(messages)}: изпратени {batch_sent}')
+
+        self.stdout.write(self.style.SUCCESS(f'Изпратени: {sent}, неуспешни опити: {failed}'))
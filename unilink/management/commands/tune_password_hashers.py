@@ -0,0 +1,105 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from unilink.hashers import (
+    MIN_HASH_PARAMS, Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher, tuned_params,
+)
+
+SAMPLE_PASSWORD = 'Tune-UniLink-2025!'
+
+
+def measure(hasher, rounds=3):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.encode(SAMPLE_PASSWORD, hasher.salt())
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def instance(hasher_class, params):
+    # Временен подклас, за да се пробват стойности без да се пипат настроените свойства.
+    return type(hasher_class.__name__, (hasher_class,), dict(params))()
+
+
+def tune_pbkdf2(target_ms):
+    probe = 100_000
+    elapsed = measure(instance(PBKDF2PasswordHasher, {'iterations': probe}))
+    # Времето на PBKDF2 расте линейно с итерациите.
+    iterations = int(probe * target_ms / elapsed) // 10_000 * 10_000
+    return {'iterations': max(iterations, MIN_HASH_PARAMS['pbkdf2_sha256']['iterations'])}
+
+
+def tune_stepwise(hasher_class, algorithm, name, start, fixed, target_ms, step):
+    # Увеличава параметъра, докато следващата стойност не надхвърли целевото време.
+    value = start
+    while True:
+        candidate = step(value)
+        params = {**fixed, name: candidate}
+        if measure(instance(hasher_class, params)) > target_ms:
+            break
+        value = candidate
+    return {**fixed, name: max(value, MIN_HASH_PARAMS[algorithm][name])}
+
+
+TUNERS = {
+    'pbkdf2_sha256': (PBKDF2PasswordHasher, tune_pbkdf2),
+    'argon2': (Argon2PasswordHasher, lambda target_ms: tune_stepwise(
+        Argon2PasswordHasher, 'argon2', 'time_cost', MIN_HASH_PARAMS['argon2']['time_cost'],
+        {'memory_cost': 65_536, 'parallelism': 1}, target_ms, lambda value: value + 1,
+    )),
+    'scrypt': (ScryptPasswordHasher, lambda target_ms: tune_stepwise(
+        ScryptPasswordHasher, 'scrypt', 'work_factor', MIN_HASH_PARAMS['scrypt']['work_factor'],
+        {}, target_ms, lambda value: value * 2,
+    )),
+}
+
+
+class Command(BaseCommand):
+    help = ('Измерва хеширането на пароли на тази машина и избира най-високата цена, която се вписва '
+            'в целевото време. С --save записва параметрите в UNILINK_PASSWORD_HASH_PARAMS_FILE; '
+            'пуснете я при разгръщане на всяка машина.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250,
+                            help='Целево време за едно хеширане в милисекунди.')
+        parser.add_argument('--algorithm', action='append', choices=sorted(TUNERS), dest='algorithms',
+                            help='Алгоритъм за настройване (може да се повтаря; по подразбиране всички налични).')
+        parser.add_argument('--save', action='store_true')
+
+    def handle(self, *args, **options):
+        target_ms = options['target_ms']
+        results = {}
+
+        for algorithm in options['algorithms'] or sorted(TUNERS):
+            hasher_class, tune = TUNERS[algorithm]
+            if hasher_class.library:
+                try:
+                    hasher_class()._load_library()
+                except ValueError as exc:
+                    self.stdout.write(self.style.WARNING(f'{algorithm}: пропуснат ({exc})'))
+                    continue
+
+            params = tune(target_ms)
+            elapsed = measure(instance(hasher_class, params))
+            results[algorithm] = params
+
+            style = self.style.SUCCESS if elapsed <= target_ms else self.style.WARNING
+            self.stdout.write(style(f'{algorithm}: {json.dumps(params)} – {elapsed:.0f} ms'))
+            if elapsed > target_ms:
+                self.stdout.write(f'  Минималните параметри надхвърлят {target_ms:.0f} ms на тази машина.')
+
+        if not results:
+            raise CommandError('Няма наличен алгоритъм за настройване.')
+
+        if options['save']:
+            path = settings.UNILINK_PASSWORD_HASH_PARAMS_FILE
+            params = {**tuned_params(), **results}
+            with open(path, 'w', encoding='utf-8') as params_file:
+                json.dump(params, params_file, indent=2, sort_keys=True)
+            tuned_params.cache_clear()
+            self.stdout.write(f'Параметрите са записани в {path}. Старите хешове се обновяват при следващия вход.')
@@ -0,0 +1,178 @@
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.dispatch import Signal, receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Изпраща се от кода, който иска да отчете времето на отделна стъпка
+# (хеширане на пароли, рендериране и т.н.): name, duration (секунди).
+timing_recorded = Signal()
+
+_current_request = ContextVar('unilink_request_metrics', default=None)
+
+
+class RequestMetrics:
+    # Данните за една заявка; попълват се от middleware-а и от timing_recorded.
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.duplicate_queries = 0
+        self.db_time = 0.0
+        self.timings = {}
+        self._seen = set()
+
+    def record_query(self, sql, params, duration):
+        self.queries += 1
+        self.db_time += duration
+        # Дубликат е същият SQL със същите параметри, изпълнен повторно в заявката.
+        key = (sql, repr(params))
+        if key in self._seen:
+            self.duplicate_queries += 1
+        else:
+            self._seen.add(key)
+
+    def record_timing(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(sql, params, time.perf_counter() - started)
+
+
+class MetricsRegistry:
+    # Броячи и хистограми в паметта на процеса. Всеки worker има свой регистър,
+    # затова Prometheus трябва да чете /metrics от всеки процес поотделно.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(DURATION_BUCKETS), 0, 0.0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(b), c, s)) for key, (b, c, s) in self.histograms.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{format_labels(labels)} {value}')
+
+        for (name, labels), (buckets, count, total) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {bucket_count}')
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {total:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+
+def current_request_metrics():
+    return _current_request.get()
+
+
+@contextmanager
+def timed(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing_recorded.send(sender=None, name=name, duration=time.perf_counter() - started)
+
+
+@receiver(timing_recorded)
+def collect_timing(sender, name, duration, **kwargs):
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.record_timing(name, duration)
+    registry.observe('unilink_step_duration_seconds', {'step': name}, duration)
+
+
+def record_request(view, method, status, metrics):
+    labels = {'view': view, 'method': method}
+    duration = time.perf_counter() - metrics.started
+
+    registry.inc('unilink_requests_total', {**labels, 'status': str(status)})
+    registry.observe('unilink_request_duration_seconds', labels, duration)
+    if metrics.sampled:
+        registry.inc('unilink_sampled_requests_total', labels)
+        registry.inc('unilink_db_queries_total', labels, metrics.queries)
+        registry.inc('unilink_db_duplicate_queries_total', labels, metrics.duplicate_queries)
+        registry.observe('unilink_db_duration_seconds', labels, metrics.db_time)
+    return duration
+
+
+def server_timing_header(metrics, duration):
+    parts = [f'app;dur={duration * 1000:.1f}']
+    if metrics.sampled:
+        parts.append(
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries, {metrics.duplicate_queries} duplicate"'
+        )
+    parts.extend(f'{name};dur={value * 1000:.1f}' for name, value in metrics.timings.items())
+    return ', '.join(parts)
+
+
+def metrics_view(request):
+    # Достъп със служебен акаунт или с "Authorization: Bearer <UNILINK_METRICS_TOKEN>".
+    token = getattr(settings, 'UNILINK_METRICS_TOKEN', None)
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    allowed = (token and hmac.compare_digest(provided, token)) or request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,136 @@
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import RequestMetrics, _current_request, record_request, server_timing_header, timed
+from .routers import PIN_COOKIE, RoutingState, _routing, read_replicas
+
+
+class PerformanceMetricsMiddleware:
+    # Всяка заявка се брои и се измерва общото ѝ време. Заявките към базата се
+    # проследяват само за извадка (UNILINK_METRICS_SAMPLE_RATE), защото execute_wrapper
+    # добавя работа на всяка SQL заявка.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'UNILINK_METRICS_SAMPLE_RATE', 0.01)
+        self.server_timing = getattr(settings, 'UNILINK_SERVER_TIMING', settings.DEBUG)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics(sampled=random.random() < self.sample_rate)
+        token = _current_request.set(metrics)
+        try:
+            if metrics.sampled:
+                with ExitStack() as stack:
+                    self.track_queries(stack, metrics)
+                    response = self.get_response(request)
+            else:
+                response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(sampled=random.random() < self.sample_rate)
+        token = _current_request.set(metrics)
+        try:
+            if metrics.sampled:
+                # Връзките с базата са за нишка, а async ORM изпълнява заявките в нишката
+                # на заявката (sync_to_async); обвивките се слагат и махат в нея.
+                stack = ExitStack()
+                await sync_to_async(self.track_queries)(stack, metrics)
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    await sync_to_async(stack.close)()
+            else:
+                response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def track_queries(stack, metrics):
+        # Заявките към репликите (unilink.routers) също се броят.
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(metrics))
+
+    def finish(self, request, response, metrics):
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        duration = record_request(view, request.method, response.status_code, metrics)
+
+        if self.server_timing:
+            response['Server-Timing'] = server_timing_header(metrics, duration)
+        return response
+
+    def process_template_response(self, request, response):
+        # TemplateResponse се рендерира след view-то; времето за рендериране
+        # (вкл. crispy формите) се отчита като отделна стъпка.
+        render = response.render
+
+        def timed_render():
+            with timed('render'):
+                return render()
+
+        response.render = timed_render
+        return response
+
+
+class PrimaryPinningMiddleware:
+    # Заявка, която е записала нещо, закрепва браузъра към основната база за
+    # UNILINK_REPLICA_PIN_SECONDS (бисквитка), докато репликите наваксат.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'UNILINK_REPLICA_PIN_SECONDS', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = self.routing_state(request)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        # sync_to_async копира контекста, така че рутерът в нишката вижда същото състояние.
+        state = self.routing_state(request)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    def routing_state(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return RoutingState(pinned=pinned_until > time.time())
+
+    def finish(self, response, state):
+        if state.wrote and read_replicas():
+            response.set_cookie(PIN_COOKIE, str(int(time.time()) + self.pin_seconds), max_age=self.pin_seconds,
+                                httponly=True, samesite='Lax')
+        return response
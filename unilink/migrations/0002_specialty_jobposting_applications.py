@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:23
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150, verbose_name='Заглавие на обявата')),
+                ('description', models.TextField(verbose_name='Изисквания/Описание')),
+                ('is_open', models.BooleanField(default=True, verbose_name='Отворена за кандидатстване')),
+            ],
+            options={
+                'verbose_name': 'Обява за Работа',
+                'verbose_name_plural': 'Обяви за Работа',
+                'ordering': ['-is_open', 'title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Specialty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Име на специалността')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+            ],
+            options={
+                'verbose_name': 'Специалност',
+                'verbose_name_plural': 'Специалности',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={'verbose_name': 'Потребител', 'verbose_name_plural': 'Потребители'},
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, verbose_name='email address'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='faculty_number',
+            field=models.CharField(blank=True, help_text='Използва се за вход от студенти.', max_length=10, null=True, unique=True, verbose_name='Факултетен Номер'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='is_approved',
+            field=models.BooleanField(default=False, help_text='Определя дали потребителят е одобрен от администратор за вход.', verbose_name='Одобрен от Администратор'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='service_email',
+            field=models.EmailField(blank=True, help_text='Използва се за вход от преподаватели/служители.', max_length=254, null=True, unique=True, verbose_name='Служебен Имейл'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='applied_job_posting',
+            field=models.ForeignKey(blank=True, help_text='Избраната позиция по време на кандидатстването.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='unilink.jobposting', verbose_name='Кандидатствана Позиция (Осн. Модел)'),
+        ),
+        migrations.CreateModel(
+            name='LecturerApplication',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Потребител')),
+                ('title', models.CharField(blank=True, max_length=50, verbose_name='Титла/Степен')),
+                ('department', models.CharField(blank=True, max_length=150, verbose_name='Факултет/Катедра')),
+                ('education_path', models.TextField(verbose_name='Образователен път (Бакалавър, Доктор и т.н.)')),
+                ('certifications', models.TextField(blank=True, verbose_name='Специализации и сертифицирани курсове')),
+                ('memberships', models.TextField(blank=True, verbose_name='Професионални членства')),
+                ('teaching_experience', models.TextField(verbose_name='Преподавателски стаж')),
+                ('courses_taught', models.TextField(verbose_name='Ръководени курсове и дисциплини')),
+                ('research_publications', models.TextField(verbose_name='Проекти, изследвания, публикации')),
+                ('motivation_goals', models.TextField(verbose_name='Мотивация и цели/Принос')),
+                ('document_notes', models.TextField(blank=True, verbose_name='Бележки за прикачени документи (CV, Дипломи)')),
+                ('statement_of_truth', models.BooleanField(default=False, verbose_name='Потвърждение за достоверност на данните')),
+                ('status', models.CharField(choices=[('SUBMITTED', 'Подаден'), ('IN_REVIEW', 'На разглеждане'), ('INTERVIEW', 'Интервю'), ('APPROVED', 'Одобрен'), ('REJECTED', 'Отказан')], default='SUBMITTED', max_length=15, verbose_name='Статус')),
+                ('applied_job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='unilink.jobposting', verbose_name='Кандидатства за позиция')),
+            ],
+            options={
+                'verbose_name': 'Преподавателско Кандидатстване',
+                'verbose_name_plural': 'Преподавателски Кандидатствания',
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='applied_specialty',
+            field=models.ForeignKey(blank=True, help_text='Избраната специалност по време на кандидатстването.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='unilink.specialty', verbose_name='Кандидатствана Специалност (Осн. Модел)'),
+        ),
+        migrations.CreateModel(
+            name='StudentApplication',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Потребител')),
+                ('egn', models.CharField(max_length=10, unique=True, verbose_name='ЕГН/ЛНЧ')),
+                ('date_of_birth', models.DateField(default=datetime.date(2000, 1, 1), verbose_name='Дата на раждане')),
+                ('phone_number', models.CharField(blank=True, max_length=20, verbose_name='Телефон')),
+                ('address', models.TextField(blank=True, verbose_name='Адрес')),
+                ('high_school', models.CharField(max_length=255, verbose_name='Завършено средно училище')),
+                ('gpa', models.DecimalField(decimal_places=2, max_digits=3, verbose_name='Среден успех (GPA)')),
+                ('certificates', models.TextField(blank=True, verbose_name='Сертификати/Езикови удостоверения')),
+                ('motivation', models.TextField(verbose_name='Мотивация за избора')),
+                ('extra_info', models.TextField(blank=True, verbose_name='Участие в състезания/Доброволчество')),
+                ('consent_gdpr', models.BooleanField(default=False, verbose_name='Съгласие за обработка на лични данни')),
+                ('status', models.CharField(choices=[('SUBMITTED', 'Подаден'), ('IN_REVIEW', 'В обработка'), ('APPROVED', 'Одобрен'), ('ACCEPTED', 'Приет'), ('REJECTED', 'Отказан')], default='SUBMITTED', max_length=15, verbose_name='Статус')),
+                ('specialty_priority_1', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='applicants_p1', to='unilink.specialty', verbose_name='Първо желание')),
+                ('specialty_priority_2', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='applicants_p2', to='unilink.specialty', verbose_name='Второ желание')),
+                ('specialty_priority_3', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='applicants_p3', to='unilink.specialty', verbose_name='Трето желание')),
+            ],
+            options={
+                'verbose_name': 'Студентско Кандидатстване',
+                'verbose_name_plural': 'Студентски Кандидатствания',
+            },
+        ),
+    ]
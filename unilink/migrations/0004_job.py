@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0003_user_service_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=100, verbose_name='Задача')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Параметри')),
+                ('status', models.CharField(choices=[('QUEUED', 'В опашката'), ('RUNNING', 'Изпълнява се'), ('DONE', 'Завършена'), ('FAILED', 'Неуспешна')], default='QUEUED', max_length=10, verbose_name='Статус')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Прогрес (%)')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Резултат')),
+                ('error', models.TextField(blank=True, verbose_name='Грешка')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Опити')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Максимален брой опити')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изпълни след')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Заключена в')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Създадена')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновена')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Създадена от')),
+            ],
+            options={
+                'verbose_name': 'Фонова Задача',
+                'verbose_name_plural': 'Фонови Задачи',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='unilink_job_status_run_idx')],
+            },
+        ),
+    ]
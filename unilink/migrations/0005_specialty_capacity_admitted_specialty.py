@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0004_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='specialty',
+            name='capacity',
+            field=models.PositiveIntegerField(default=0, help_text='Използва се при класирането. 0 означава, че специалността не приема студенти.', verbose_name='Брой места'),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='admitted_specialty',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admitted_students', to='unilink.specialty', verbose_name='Класиран в'),
+        ),
+    ]
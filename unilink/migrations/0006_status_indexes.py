@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('unilink', '0005_specialty_capacity_admitted_specialty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lecturerapplication',
+            index=models.Index(fields=['status', 'applied_job'], name='unilink_la_status_job_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentapplication',
+            index=models.Index(fields=['status', 'specialty_priority_1'], name='unilink_sa_status_p1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'is_approved'], name='unilink_user_role_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['-date_joined'], name='unilink_user_pending_idx'),
+        ),
+    ]
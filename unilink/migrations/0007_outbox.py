@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0006_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Outbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Вид')),
+                ('dedupe_key', models.CharField(max_length=200, unique=True, verbose_name='Ключ за уникалност')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Получател')),
+                ('subject', models.CharField(max_length=200, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Съдържание')),
+                ('status', models.CharField(choices=[('PENDING', 'Чака изпращане'), ('SENT', 'Изпратено'), ('FAILED', 'Неуспешно')], default='PENDING', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Опити')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Максимален брой опити')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изпрати след')),
+                ('error', models.TextField(blank=True, verbose_name='Грешка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Създадено')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Изпратено на')),
+            ],
+            options={
+                'verbose_name': 'Известие',
+                'verbose_name_plural': 'Изходящи Известия',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'send_after'], name='unilink_outbox_status_send_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:56
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_TABLES = ('unilink_studentapplication', 'unilink_lecturerapplication')
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN индексът е само за PostgreSQL; при SQLite (тестове, локална разработка)
+    # търсенето минава през FTS5 таблица до всяка таблица с кандидатури.
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)')
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {table}_fts USING fts5(primary_text, secondary_text)'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0007_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lecturerapplication',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
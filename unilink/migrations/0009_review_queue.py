@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_submitted_at(apps, schema_editor):
+    # Най-близкото налично време за съществуващите кандидатури е регистрацията на потребителя.
+    User = apps.get_model('unilink', 'User')
+    for model_name in ('StudentApplication', 'LecturerApplication'):
+        model = apps.get_model('unilink', model_name)
+        model.objects.update(submitted_at=models.Subquery(
+            User.objects.filter(pk=models.OuterRef('user_id')).values('date_joined')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0008_application_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lecturerapplication',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взета за преглед на'),
+        ),
+        migrations.AddField(
+            model_name='lecturerapplication',
+            name='reviewer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Преглежда се от'),
+        ),
+        migrations.AddField(
+            model_name='lecturerapplication',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Подадено на'),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взета за преглед на'),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='reviewer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Преглежда се от'),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Подадено на'),
+        ),
+        migrations.RunPython(backfill_submitted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lecturerapplication',
+            index=models.Index(fields=['status', 'submitted_at', 'user'], name='unilink_la_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentapplication',
+            index=models.Index(fields=['status', 'submitted_at', 'user'], name='unilink_sa_queue_idx'),
+        ),
+    ]
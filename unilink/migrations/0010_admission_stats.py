@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0009_review_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdmissionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=30, verbose_name='Измерение')),
+                ('key', models.CharField(max_length=50, verbose_name='Ключ')),
+                ('count', models.IntegerField(default=0, verbose_name='Брой')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сума')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновено')),
+            ],
+            options={
+                'verbose_name': 'Статистика',
+                'verbose_name_plural': 'Статистика на кандидатстването',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unilink_stat_dimension_key_uniq')],
+            },
+        ),
+    ]
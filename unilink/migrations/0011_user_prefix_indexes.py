@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Автодовършването в админа търси по начало на тези полета (username__istartswith и т.н.),
+# което PostgreSQL превежда до UPPER(колона::text) LIKE 'ТЕРМИН%'.
+PREFIX_INDEXES = {
+    'unilink_user_username_prefix_idx': 'username',
+    'unilink_user_faculty_number_prefix_idx': 'faculty_number',
+    'unilink_user_service_email_prefix_idx': 'service_email',
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # Обикновен B-tree индекс не помага за LIKE при не-C колация; text_pattern_ops е само за PostgreSQL.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON unilink_user (UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0010_admission_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
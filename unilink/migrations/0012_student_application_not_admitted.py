@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0011_user_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentapplication',
+            name='status',
+            field=models.CharField(choices=[('SUBMITTED', 'Подаден'), ('IN_REVIEW', 'В обработка'), ('APPROVED', 'Одобрен'), ('ACCEPTED', 'Приет'), ('REJECTED', 'Отказан'), ('NOT_ADMITTED', 'Некласиран')], default='SUBMITTED', max_length=15, verbose_name='Статус'),
+        ),
+    ]
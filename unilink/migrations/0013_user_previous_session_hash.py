@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unilink', '0012_student_application_not_admitted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='previous_session_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=128),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:46
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_duplicates(apps, schema_editor):
+    # Служебни имейли, които се различават само по регистъра, трябва да се обединят
+    # ръчно преди миграцията; иначе уникалният индекс не може да се създаде.
+    User = apps.get_model('unilink', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias)
+        .filter(service_email__isnull=False)
+        .values(email_lower=Lower('service_email'))
+        .annotate(count=Count('pk'))
+        .filter(count__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Служебни имейли, различаващи се само по регистъра, трябва първо да се обединят: ' + ', '.join(sorted(duplicates))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('unilink', '0013_user_previous_session_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('service_email'), name='unilink_user_email_lower_uniq', violation_error_message='Потребител с този служебен имейл вече съществува.'),
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='unilink_user_email_lower_idx',
+        ),
+    ]
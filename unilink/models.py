@@ -1,8 +1,14 @@
+from django.contrib.auth.hashers import check_password
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from datetime import date
 
+from .hashers import acheck_user_password, schedule_rehash
+
 
 class Role(models.TextChoices):
     STUDENT = 'STUDENT', _('Студент')
@@ -15,6 +21,11 @@ class Specialty(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name=_("Име на специалността"))
     description = models.TextField(blank=True, verbose_name=_("Описание"))
     is_active = models.BooleanField(default=True, verbose_name=_("Активна"))
+    capacity = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Брой места"),
+        help_text=_("Използва се при класирането. 0 означава, че специалността не приема студенти.")
+    )
 
     class Meta:
         verbose_name = _("Специалност")
@@ -59,6 +70,9 @@ class StudentApplication(models.Model):
                                              related_name='applicants_p3', verbose_name=_("Трето желание"))
     motivation = models.TextField(verbose_name=_("Мотивация за избора"))
 
+    admitted_specialty = models.ForeignKey(Specialty, on_delete=models.SET_NULL, null=True, blank=True,
+                                           related_name='admitted_students', verbose_name=_("Класиран в"))
+
     extra_info = models.TextField(blank=True, verbose_name=_("Участие в състезания/Доброволчество"))
 
     consent_gdpr = models.BooleanField(default=False, verbose_name=_("Съгласие за обработка на лични данни"))
@@ -69,12 +83,28 @@ class StudentApplication(models.Model):
         ('APPROVED', _('Одобрен')),
         ('ACCEPTED', _('Приет')),
         ('REJECTED', _('Отказан')),
+        # Некласиран при последното класиране (unilink.admissions); за разлика от REJECTED,
+        # който е решение на проверяващ, участва отново в следващото класиране.
+        ('NOT_ADMITTED', _('Некласиран')),
     ]
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='SUBMITTED', verbose_name=_("Статус"))
 
+    submitted_at = models.DateTimeField(default=timezone.now, verbose_name=_("Подадено на"))
+    # Опашка за преглед (unilink.review_queue): кой е взел кандидатурата и кога.
+    reviewer = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='+', verbose_name=_("Преглежда се от"))
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Взета за преглед на"))
+
+    # Поддържа се от unilink.search; GIN индексът е в миграция 0008 (само за PostgreSQL).
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = _("Студентско Кандидатстване")
         verbose_name_plural = _("Студентски Кандидатствания")
+        indexes = [
+            models.Index(fields=['status', 'specialty_priority_1'], name='unilink_sa_status_p1_idx'),
+            models.Index(fields=['status', 'submitted_at', 'user'], name='unilink_sa_queue_idx'),
+        ]
 
     def __str__(self):
         return f"Кандидатура на {self.user.get_full_name()}"
@@ -110,9 +140,20 @@ class LecturerApplication(models.Model):
     ]
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='SUBMITTED', verbose_name=_("Статус"))
 
+    submitted_at = models.DateTimeField(default=timezone.now, verbose_name=_("Подадено на"))
+    reviewer = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='+', verbose_name=_("Преглежда се от"))
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Взета за преглед на"))
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = _("Преподавателско Кандидатстване")
         verbose_name_plural = _("Преподавателски Кандидатствания")
+        indexes = [
+            models.Index(fields=['status', 'applied_job'], name='unilink_la_status_job_idx'),
+            models.Index(fields=['status', 'submitted_at', 'user'], name='unilink_la_queue_idx'),
+        ]
 
     def __str__(self):
         return f"Кандидатура на {self.user.get_full_name()} за {self.applied_job.title}"
@@ -165,9 +206,28 @@ class User(AbstractUser):
         help_text=_("Избраната позиция по време на кандидатстването.")
     )
 
+    # Хешът за сесии (get_session_auth_hash) отпреди фоновото прехеширане на паролата
+    # (unilink.hashers.rehash_password). Пази се в базата, за да го виждат всички процеси.
+    previous_session_hash = models.CharField(max_length=128, blank=True, default='', editable=False)
+
     class Meta:
         verbose_name = _("Потребител")
         verbose_name_plural = _("Потребители")
+        constraints = [
+            # Вход с служебен имейл търси по LOWER(service_email), затова имейлът е уникален
+            # без значение от регистъра; уникалният индекс обслужва и самото търсене.
+            models.UniqueConstraint(
+                Lower('service_email'),
+                name='unilink_user_email_lower_uniq',
+                violation_error_message=_("Потребител с този служебен имейл вече съществува."),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['role', 'is_approved'], name='unilink_user_role_approved_idx'),
+            # Опашката с чакащи одобрение (UserAdmin подрежда по -date_joined).
+            models.Index(fields=['-date_joined'], condition=models.Q(is_approved=False),
+                         name='unilink_user_pending_idx'),
+        ]
 
     def is_student(self):
         return self.role == Role.STUDENT
@@ -178,8 +238,127 @@ class User(AbstractUser):
     def is_admin(self):
         return self.role == Role.ADMIN or self.is_staff
 
+    def set_password(self, raw_password):
+        # Смяна на паролата прекратява и сесиите отпреди прехеширането.
+        super().set_password(raw_password)
+        self.previous_session_hash = ''
+
+    def set_unusable_password(self):
+        super().set_unusable_password()
+        self.previous_session_hash = ''
+
+    def check_password(self, raw_password):
+        # Django прехешира остарелите хешове веднага, в заявката за вход;
+        # тук това става във фонов поток (unilink.hashers.schedule_rehash).
+        return check_password(raw_password, self.password, lambda raw: schedule_rehash(self, raw))
+
+    async def acheck_password(self, raw_password):
+        # Хеширането е в ограничения пул на unilink.hashers, а не в общия пул на asyncio.
+        return await acheck_user_password(self, raw_password)
+
+    def get_session_auth_fallback_hash(self):
+        yield from super().get_session_auth_fallback_hash()
+        # Сесия, подписана с хеша отпреди фоновото прехеширане, остава валидна.
+        if self.previous_session_hash:
+            yield self.previous_session_hash
+
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'email']
 
     def __str__(self):
         return self.username
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'QUEUED', _('В опашката')
+    RUNNING = 'RUNNING', _('Изпълнява се')
+    DONE = 'DONE', _('Завършена')
+    FAILED = 'FAILED', _('Неуспешна')
+
+
+class Job(models.Model):
+    task = models.CharField(max_length=100, verbose_name=_("Задача"))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("Параметри"))
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED,
+                              verbose_name=_("Статус"))
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name=_("Прогрес (%)"))
+    result = models.JSONField(null=True, blank=True, verbose_name=_("Резултат"))
+    error = models.TextField(blank=True, verbose_name=_("Грешка"))
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Опити"))
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name=_("Максимален брой опити"))
+    run_after = models.DateTimeField(default=timezone.now, verbose_name=_("Изпълни след"))
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Заключена в"))
+
+    created_by = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+', verbose_name=_("Създадена от"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Създадена"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Обновена"))
+
+    class Meta:
+        verbose_name = _("Фонова Задача")
+        verbose_name_plural = _("Фонови Задачи")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='unilink_job_status_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = 'PENDING', _('Чака изпращане')
+    SENT = 'SENT', _('Изпратено')
+    FAILED = 'FAILED', _('Неуспешно')
+
+
+class Outbox(models.Model):
+    # Записва се в същата транзакция като промяната, за която уведомява;
+    # изпраща се по-късно от unilink.notifications.dispatch_outbox.
+    kind = models.CharField(max_length=50, verbose_name=_("Вид"))
+    dedupe_key = models.CharField(max_length=200, unique=True, verbose_name=_("Ключ за уникалност"))
+    recipient = models.EmailField(verbose_name=_("Получател"))
+    subject = models.CharField(max_length=200, verbose_name=_("Тема"))
+    body = models.TextField(verbose_name=_("Съдържание"))
+
+    status = models.CharField(max_length=10, choices=OutboxStatus.choices, default=OutboxStatus.PENDING,
+                              verbose_name=_("Статус"))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Опити"))
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name=_("Максимален брой опити"))
+    send_after = models.DateTimeField(default=timezone.now, verbose_name=_("Изпрати след"))
+    error = models.TextField(blank=True, verbose_name=_("Грешка"))
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Създадено"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Изпратено на"))
+
+    class Meta:
+        verbose_name = _("Известие")
+        verbose_name_plural = _("Изходящи Известия")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='unilink_outbox_status_send_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} → {self.recipient} ({self.get_status_display()})"
+
+
+class AdmissionStat(models.Model):
+    # Предварително агрегирани броячи за таблото със статистики; поддържат се от
+    # unilink.stats и се сверяват с командата rebuild_stats.
+    dimension = models.CharField(max_length=30, verbose_name=_("Измерение"))
+    key = models.CharField(max_length=50, verbose_name=_("Ключ"))
+    count = models.IntegerField(default=0, verbose_name=_("Брой"))
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name=_("Сума"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Обновено"))
+
+    class Meta:
+        verbose_name = _("Статистика")
+        verbose_name_plural = _("Статистика на кандидатстването")
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unilink_stat_dimension_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key} = {self.count}"
@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Outbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+# Докато партидата се изпраща, send_after се мести напред; ако диспечерът спре,
+# съобщенията стават отново достъпни след изтичането му.
+OUTBOX_LEASE = timedelta(minutes=5)
+RETRY_BACKOFF_SECONDS = 60
+
+# Вид на известието: (тема, текст). Текстът се форматира с полетата на потребителя.
+NOTIFICATIONS = {
+    'application_submitted': (
+        'UniLink: кандидатурата Ви е получена',
+        'Здравейте, {first_name},\n\n'
+        'Получихме кандидатстването Ви като {role}. Ще Ви уведомим, когато профилът Ви бъде одобрен.\n\n'
+        'UniLink',
+    ),
+    'account_approved': (
+        'UniLink: профилът Ви е одобрен',
+        'Здравейте, {first_name},\n\n'
+        'Профилът Ви ({username}) беше одобрен. Данните за вход ще получите от администрацията.\n\n'
+        'UniLink',
+    ),
+}
+
+
+def queue_notifications(kind, users, event):
+    # Вика се в транзакцията на самата промяна: известието се записва само ако
+    # промяната е записана. event идентифицира събитието (кандидатура, задача за
+    # одобрение): повторно известие за същото събитие се игнорира, а ново събитие
+    # от същия вид (напр. повторно одобрение) изпраща ново известие.
+    subject, body = NOTIFICATIONS[kind]
+    Outbox.objects.bulk_create([
+        Outbox(
+            kind=kind,
+            dedupe_key=f'{kind}:{event}:{user.pk}',
+            recipient=user.email,
+            subject=subject,
+            body=body.format(
+                first_name=user.first_name or user.username,
+                username=user.username,
+                role=user.get_role_display(),
+            ),
+        )
+        for user in users
+        if user.email
+    ], ignore_conflicts=True)
+
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE):
+    now = timezone.now()
+    lease_until = now + OUTBOX_LEASE
+    with transaction.atomic():
+        pks = list(
+            Outbox.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxStatus.PENDING, send_after__lte=now)
+            .order_by('send_after', 'pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return []
+        # Условието по send_after потвърждава заемането и при SQLite, където FOR UPDATE липсва.
+        Outbox.objects.filter(pk__in=pks, status=OutboxStatus.PENDING, send_after__lte=now).update(
+            send_after=lease_until, attempts=F('attempts') + 1
+        )
+
+    return list(Outbox.objects.filter(pk__in=pks, send_after=lease_until).order_by('pk'))
+
+
+def retry_later(message, error):
+    message.error = str(error)
+    if message.attempts < message.max_attempts:
+        message.send_after = timezone.now() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (message.attempts - 1))
+    else:
+        message.status = OutboxStatus.FAILED
+    logger.warning('Известие #%s до %s не беше изпратено (опит %s): %s',
+                   message.pk, message.recipient, message.attempts, error)
+
+
+def dispatch_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    # Цялата партида минава през една SMTP връзка вместо по една на писмо.
+    messages = claim_batch(batch_size)
+    if not messages:
+        return messages
+
+    pending = list(messages)
+    try:
+        with get_connection() as connection:
+            while pending:
+                message = pending[0]
+                try:
+                    connection.send_messages([
+                        EmailMessage(message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.recipient])
+                    ])
+                except Exception as exc:
+                    retry_later(message, exc)
+                else:
+                    message.status = OutboxStatus.SENT
+                    message.sent_at = timezone.now()
+                    message.error = ''
+                pending.pop(0)
+    except Exception as exc:
+        # Връзката не се отвори или прекъсна: останалите се опитват отново по-късно.
+        for message in pending:
+            retry_later(message, exc)
+
+    Outbox.objects.bulk_update(messages, ['status', 'sent_at', 'send_after', 'error'])
+    return messages
@@ -0,0 +1,114 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import get_language
+
+from .cache import CHOICE_SOURCES, get_choices_version
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+CSRF_PLACEHOLDER = '__unilink_csrf_token__'
+
+
+def is_cacheable_request(request):
+    # Кешират се само анонимни GET заявки без параметри и без чакащи flash съобщения.
+    return (
+        getattr(settings, 'UNILINK_PAGE_CACHE', True)
+        and request.method in ('GET', 'HEAD')
+        and not request.GET
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def page_cache_key(request):
+    # Версиите на изборите са част от ключа, така че промяна на Specialty/JobPosting
+    # изчиства и кешираните страници.
+    versions = ':'.join(str(get_choices_version(source)) for source in CHOICE_SOURCES)
+    return f'unilink:page:{versions}:{get_language()}:{request.path}'
+
+
+def csrf_placeholder(request):
+    # Контекстен процесор: докато страницата се рендерира за кеша, {% csrf_token %}
+    # извежда маркер, който се заменя с истински токен при всяко връщане от кеша.
+    if getattr(request, 'unilink_page_cache_render', False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
+
+
+def cached_page_response(request, content, content_type):
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=content_type)
+    patch_vary_headers(response, ('Accept-Language', 'Cookie'))
+    return response
+
+
+def cacheable_content(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    return response.content.decode(response.charset), response['Content-Type']
+
+
+def cache_anonymous_page(view):
+    if iscoroutinefunction(view):
+        return cache_anonymous_page_async(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            request.unilink_page_cache_render = True
+            try:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+            finally:
+                request.unilink_page_cache_render = False
+
+            cached = cacheable_content(response)
+            if cached is None:
+                return response
+            cache.set(key, cached, PAGE_CACHE_TIMEOUT)
+
+        return cached_page_response(request, *cached)
+
+    return wrapper
+
+
+def cache_anonymous_page_async(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Потребителят се зарежда с auser(), за да не се чете синхронно в is_cacheable_request.
+        request.user = await request.auser()
+        if not is_cacheable_request(request):
+            return await view(request, *args, **kwargs)
+
+        key = await sync_to_async(page_cache_key)(request)
+        cached = await cache.aget(key)
+        if cached is None:
+            request.unilink_page_cache_render = True
+            try:
+                response = await view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    await sync_to_async(response.render)()
+            finally:
+                request.unilink_page_cache_render = False
+
+            cached = cacheable_content(response)
+            if cached is None:
+                return response
+            await cache.aset(key, cached, PAGE_CACHE_TIMEOUT)
+
+        return cached_page_response(request, *cached)
+
+    return wrapper
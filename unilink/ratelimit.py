@@ -0,0 +1,119 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import registry
+
+# (брой неуспешни опита, прозорец в секунди)
+DEFAULT_LOGIN_LIMITS = {
+    'identifier': (10, 15 * 60),
+    # Много студенти излизат през един и същ адрес на университетската мрежа.
+    'ip': (100, 5 * 60),
+}
+
+
+class SlidingWindowLimiter:
+    # Приближен плъзгащ се прозорец с два фиксирани брояча в кеша: текущият
+    # и предишният прозорец, претеглен с частта от него, която още е в обхвата.
+    # Проверката е едно get_many, отчитането – едно incr.
+
+    def __init__(self, scope, limit, window, cache_alias='default'):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def keys(self, value, now):
+        bucket = int(now // self.window)
+        digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+        prefix = f'unilink:ratelimit:{self.scope}:{digest}'
+        return f'{prefix}:{bucket}', f'{prefix}:{bucket - 1}', (now % self.window) / self.window
+
+    def estimate(self, counts, keys):
+        current, previous, elapsed = keys
+        return counts.get(current, 0) + counts.get(previous, 0) * (1 - elapsed)
+
+    def hit(self, value, now=None):
+        current, _, _ = self.keys(value, now or time.time())
+        cache = self.cache
+        # Ключът живее два прозореца, колкото е нужен като "предишен".
+        if cache.add(current, 1, self.window * 2):
+            return
+        try:
+            cache.incr(current)
+        except ValueError:
+            cache.set(current, 1, self.window * 2)
+
+    def reset(self, value, now=None):
+        current, previous, _ = self.keys(value, now or time.time())
+        self.cache.delete_many([current, previous])
+
+
+def login_limiters():
+    limits = {**DEFAULT_LOGIN_LIMITS, **getattr(settings, 'UNILINK_LOGIN_LIMITS', {})}
+    cache_alias = getattr(settings, 'UNILINK_RATELIMIT_CACHE', 'default')
+    return {scope: SlidingWindowLimiter(f'login:{scope}', *limits[scope], cache_alias) for scope in ('identifier', 'ip')}
+
+
+def client_ip(request):
+    # Всяко proxy добавя адреса, от който е получило заявката, в края на хедъра, затова
+    # клиентът е UNILINK_TRUSTED_PROXY_COUNT-ият адрес отзад; по-предните може да са подправени.
+    header = getattr(settings, 'UNILINK_TRUSTED_PROXY_HEADER', '')
+    if header:
+        addresses = [address.strip() for address in request.META.get(header, '').split(',') if address.strip()]
+        proxies = getattr(settings, 'UNILINK_TRUSTED_PROXY_COUNT', 1)
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def login_subjects(request, identifier):
+    # Стойностите, по които се броят опитите: нормализираният идентификатор и IP адресът.
+    subjects = {}
+    identifier = (identifier or '').strip().lower()
+    if identifier:
+        subjects['identifier'] = identifier
+    ip = client_ip(request) if request is not None else None
+    if ip:
+        subjects['ip'] = ip
+    return subjects
+
+
+def login_throttle_scope(request, identifier):
+    # Връща обхвата ('identifier' или 'ip'), чийто лимит е изчерпан, или None.
+    # Вика се преди търсенето в базата и хеширането на паролата.
+    if not getattr(settings, 'UNILINK_LOGIN_THROTTLE', True):
+        return None
+
+    limiters = login_limiters()
+    subjects = login_subjects(request, identifier)
+    if not subjects:
+        return None
+
+    now = time.time()
+    keys = {scope: limiters[scope].keys(value, now) for scope, value in subjects.items()}
+    cache = limiters['identifier'].cache
+    counts = cache.get_many([key for scope_keys in keys.values() for key in scope_keys[:2]])
+
+    for scope, scope_keys in keys.items():
+        limiter = limiters[scope]
+        if limiter.estimate(counts, scope_keys) >= limiter.limit:
+            registry.inc('unilink_login_throttled_total', {'scope': scope})
+            return scope
+    return None
+
+
+def record_login_failure(request, identifier):
+    if not getattr(settings, 'UNILINK_LOGIN_THROTTLE', True):
+        return
+
+    limiters = login_limiters()
+    for scope, value in login_subjects(request, identifier).items():
+        limiters[scope].hit(value)
+    registry.inc('unilink_login_failures_total', {})
@@ -0,0 +1,115 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .stats import record_status_change
+
+QUEUE_STATUSES = ('SUBMITTED', 'IN_REVIEW')
+QUEUE_PAGE_SIZE = 50
+CLAIM_MAX = 50
+# Над тази граница броят се показва приблизително ("10000+"), вместо да се брои точно.
+COUNT_CAP = 10_000
+COUNT_CACHE_TIMEOUT = 60
+
+
+def encode_cursor(application):
+    return f'{application.submitted_at.isoformat()}_{application.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        submitted_at, pk = cursor.rsplit('_', 1)
+        submitted_at = parse_datetime(submitted_at)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        return None
+    if submitted_at is None:
+        return None
+    return submitted_at, pk
+
+
+def queue_queryset(model, status, reviewer=None):
+    queryset = model.objects.filter(status=status)
+    if reviewer is not None:
+        queryset = queryset.filter(reviewer=reviewer)
+    return queryset
+
+
+def queue_page(queryset, after=None, limit=QUEUE_PAGE_SIZE):
+    # Keyset страниране по (submitted_at, pk) вместо OFFSET: всяка страница е
+    # обхождане на индекса от курсора нататък, независимо колко дълбоко е.
+    # Връща (записи, курсор за следващата страница или None).
+    position = decode_cursor(after) if after else None
+    if position is not None:
+        submitted_at, pk = position
+        queryset = queryset.filter(submitted_at__gte=submitted_at).filter(
+            Q(submitted_at__gt=submitted_at) | Q(pk__gt=pk)
+        )
+
+    rows = list(
+        queryset.select_related('user', 'reviewer')
+        .defer('search_vector')
+        .order_by('submitted_at', 'pk')[:limit + 1]
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def approximate_count(queryset):
+    # PostgreSQL: оценката на планировчика (без да се чете таблицата);
+    # другаде: точен брой, но най-много до COUNT_CAP. Връща (брой, дали е приблизителен).
+    sql, params = queryset.query.sql_with_params()
+    key = f'unilink:queue-count:{hashlib.md5(repr((sql, params)).encode()).hexdigest()}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        result = (int(plan[0]['Plan']['Plan Rows']), True)
+    else:
+        count = queryset[:COUNT_CAP + 1].count()
+        result = (min(count, COUNT_CAP), count > COUNT_CAP)
+
+    cache.set(key, result, COUNT_CACHE_TIMEOUT)
+    return result
+
+
+def claim_next(model, reviewer, count):
+    # Взема следващите N подадени кандидатури за reviewer. SKIP LOCKED пропуска
+    # редовете, които друг рецензент заема в момента, вместо да чака за тях.
+    count = max(1, min(count, CLAIM_MAX))
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(
+            model.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status='SUBMITTED')
+            .order_by('submitted_at', 'pk')
+            .values_list('pk', flat=True)[:count]
+        )
+        # Условието по статус потвърждава заемането и при SQLite, където FOR UPDATE липсва.
+        claimed = model.objects.filter(pk__in=pks, status='SUBMITTED').update(
+            status='IN_REVIEW', reviewer=reviewer, claimed_at=now
+        )
+        record_status_change(model, 'SUBMITTED', 'IN_REVIEW', claimed)
+    return claimed
+
+
+def release(model, reviewer, pks):
+    # Връща взети, но непрегледани кандидатури обратно в опашката.
+    with transaction.atomic():
+        released = model.objects.filter(pk__in=pks, status='IN_REVIEW', reviewer=reviewer).update(
+            status='SUBMITTED', reviewer=None, claimed_at=None
+        )
+        record_status_change(model, 'IN_REVIEW', 'SUBMITTED', released)
+    return released
@@ -0,0 +1,82 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+# Реплики се ползват само за моделите на unilink и само в изрично означени места
+# (replica_reads): списъци в админа, експорти, табла.
+# Всичко останало, вкл. сесиите и записите, отива към основната база.
+ROUTED_APPS = {'unilink'}
+PIN_COOKIE = 'unilink_primary'
+
+_replica = ContextVar('unilink_replica', default=None)
+_routing = ContextVar('unilink_routing', default=None)
+
+
+class RoutingState:
+    # Състоянието за една HTTP заявка; създава се от unilink.middleware.PrimaryPinningMiddleware.
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def read_replicas():
+    return getattr(settings, 'UNILINK_READ_REPLICAS', [])
+
+
+def primary_required():
+    state = _routing.get()
+    # След запис (в тази или в скорошна заявка) четенето е от основната база,
+    # за да вижда потребителят собствените си промени.
+    return state is not None and (state.pinned or state.wrote)
+
+
+@contextmanager
+def replica_reads():
+    # Може да се ползва и като декоратор. Една реплика за целия блок, за да не се
+    # смесват данни от реплики с различно изоставане.
+    replicas = read_replicas()
+    if not replicas or _replica.get() is not None or primary_required():
+        yield
+        return
+    token = _replica.set(random.choice(replicas))
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        replica = _replica.get()
+        if replica is None or primary_required() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None and model._meta.app_label in ROUTED_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Репликите съдържат същите данни като основната база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in read_replicas():
+            return False
+        return None
+
+
+
+def for_reading(queryset):
+    # Фиксира базата за четене в момента на извикване – за querysets, които се изпълняват
+    # след края на replica_reads (напр. в StreamingHttpResponse).
+    return queryset.using(router.db_for_read(queryset.model))
@@ -0,0 +1,145 @@
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import F, FloatField, TextField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import LecturerApplication, StudentApplication
+
+# Полета за пълнотекстово търсене: 'A' (имена, идентификатори) тежи повече от 'B' (свободен текст).
+SEARCH_DOCUMENTS = {
+    StudentApplication: {
+        'A': ('user__first_name', 'user__last_name', 'user__username', 'egn'),
+        'B': ('motivation', 'extra_info', 'high_school', 'certificates'),
+    },
+    LecturerApplication: {
+        'A': ('user__first_name', 'user__last_name', 'user__username', 'title', 'department',
+              'applied_job__title'),
+        'B': ('research_publications', 'courses_taught', 'teaching_experience', 'motivation_goals',
+              'education_path', 'certifications'),
+    },
+}
+
+SEARCH_CONFIG = 'simple'
+INDEX_BATCH_SIZE = 500
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+# Членуване и множествено число; премахва се най-дългото съвпадение, като остават поне 3 букви.
+BULGARIAN_SUFFIXES = sorted((
+    'иите', 'ията', 'ието', 'ите', 'ата', 'ето', 'ото', 'ове', 'еве',
+    'ия', 'ии', 'ът', 'ят', 'та', 'то', 'те', 'а', 'я', 'о', 'е', 'и', 'у',
+), key=len, reverse=True)
+
+
+def stem(word):
+    if len(word) <= 4 or not CYRILLIC_RE.search(word):
+        return word
+    for suffix in BULGARIAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_words(text):
+    # Малки букви, без ударения и диакритика (ѝ -> и, ё -> е), леко стемиране.
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [stem(word) for word in WORD_RE.findall(text)]
+
+
+def normalize_text(text):
+    return ' '.join(normalize_words(text))
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def search_rows(model, pks):
+    weights = SEARCH_DOCUMENTS[model]
+    fields = [field for group in weights.values() for field in group]
+    for row in model.objects.filter(pk__in=pks).values('pk', *fields).iterator(INDEX_BATCH_SIZE):
+        yield row['pk'], {
+            weight: normalize_text(' '.join(str(row[field] or '') for field in group))
+            for weight, group in weights.items()
+        }
+
+
+def index_applications(model, pks=None):
+    # Обновява индекса за подадените записи (или за всички). Извиква се от сигналите
+    # и след масови операции, които ги заобикалят (bulk_create при импорт).
+    if pks is None:
+        pks = model.objects.values_list('pk', flat=True)
+    pks = list(pks)
+    connection = connections[model.objects.db]
+
+    for start in range(0, len(pks), INDEX_BATCH_SIZE):
+        rows = list(search_rows(model, pks[start:start + INDEX_BATCH_SIZE]))
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchVector
+
+            model.objects.bulk_update([
+                model(pk=pk, search_vector=(
+                    SearchVector(Value(texts['A'], output_field=TextField()), weight='A', config=SEARCH_CONFIG)
+                    + SearchVector(Value(texts['B'], output_field=TextField()), weight='B', config=SEARCH_CONFIG)
+                ))
+                for pk, texts in rows
+            ], ['search_vector'])
+        elif connection.vendor == 'sqlite':
+            table = fts_table(model)
+            with connection.cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+                cursor.executemany(
+                    f'INSERT INTO {table} (rowid, primary_text, secondary_text) VALUES (%s, %s, %s)',
+                    [(pk, texts['A'], texts['B']) for pk, texts in rows],
+                )
+    return len(pks)
+
+
+def remove_from_index(model, pk):
+    connection = connections[model.objects.db]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {fts_table(model)} WHERE rowid = %s', [pk])
+
+
+def search_applications(queryset, search_term):
+    # Връща queryset, подреден по релевантност (анотация search_rank), или None,
+    # ако базата не поддържа пълнотекстово търсене.
+    terms = normalize_words(search_term)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        # Термите са само \w символи, затова raw заявката е безопасна; ":*" търси по префикс.
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank')
+        )
+
+    if connection.vendor == 'sqlite':
+        # Съвпаденията се прилагат като подзаявка към FTS5 таблицата, без предварителен
+        # лимит, така че филтрите на админа се комбинират с пълния набор резултати.
+        model = queryset.model
+        table = fts_table(model)
+        match = ' '.join(f'"{term}"*' for term in terms)
+        pk_column = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+        # bm25 е отрицателен и по-малкото е по-добро.
+        return (
+            queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match]))
+            .annotate(search_rank=RawSQL(
+                f'SELECT -bm25({table}, 10.0, 1.0) FROM {table} WHERE {table} MATCH %s AND rowid = {pk_column}',
+                [match],
+                output_field=FloatField(),
+            ))
+            .order_by('-search_rank')
+        )
+
+    return None
@@ -0,0 +1,70 @@
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    # cached_db (четене от кеша, запис в кеша и в базата) с два записа по-малко:
+    # - сесия, отбелязана като променена, но със същото съдържание, не се записва;
+    # - cycle_key() (при вход) не прави INSERT веднага, а новият ключ се записва
+    #   веднъж в края на заявката, заедно с данните от login().
+
+    _stored_payload = None
+    _create_pending = False
+
+    def payload(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._stored_payload = self.payload(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._stored_payload = self.payload(data)
+        return data
+
+    def cycle_key(self):
+        data = self._session
+        key = self.session_key
+        self._session_key = self._get_new_session_key()
+        self._session_cache = data
+        self._create_pending = True
+        self.modified = True
+        if key:
+            self.delete(key)
+
+    async def acycle_key(self):
+        # alogin() в unilink.async_views; сесията се записва синхронно от SessionMiddleware.
+        data = await self._aget_session()
+        key = self.session_key
+        self._session_key = await self._aget_new_session_key()
+        self._session_cache = data
+        self._create_pending = True
+        self.modified = True
+        if key:
+            await self.adelete(key)
+
+    def save(self, must_create=False):
+        if self._create_pending and not must_create:
+            # create() избира нов ключ и повтаря при съвпадение (CreateError).
+            self._create_pending = False
+            self.create()
+            return
+
+        data = self._get_session(no_load=must_create)
+        if not must_create and self.session_key is not None and self._stored_payload == self.payload(data):
+            return
+        super().save(must_create)
+        self._stored_payload = self.payload(data)
+
+    async def asave(self, must_create=False):
+        if self._create_pending and not must_create:
+            self._create_pending = False
+            await self.acreate()
+            return
+
+        data = await self._aget_session(no_load=must_create)
+        if not must_create and self.session_key is not None and self._stored_payload == self.payload(data):
+            return
+        await super().asave(must_create)
+        self._stored_payload = self.payload(data)
@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_choices, invalidate_user
+from .jobs import enqueue
+from .models import JobPosting, LecturerApplication, Specialty, StudentApplication
+from .ratelimit import record_login_failure
+from .search import index_applications, remove_from_index
+from .stats import STAT_FIELDS, record_change, stat_values
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Specialty)
+@receiver(post_delete, sender=Specialty)
+def invalidate_specialty_choices(sender, instance, **kwargs):
+    invalidate_choices('specialty')
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+def invalidate_job_posting_choices(sender, instance, **kwargs):
+    invalidate_choices('job_posting')
+
+
+# Полетата на потребителя, които влизат в индекса за търсене (unilink.search).
+SEARCH_USER_FIELDS = {'first_name', 'last_name', 'username'}
+
+
+@receiver(post_save, sender=StudentApplication)
+@receiver(post_save, sender=LecturerApplication)
+def index_application(sender, instance, **kwargs):
+    index_applications(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=StudentApplication)
+@receiver(post_delete, sender=LecturerApplication)
+def unindex_application(sender, instance, **kwargs):
+    remove_from_index(sender, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_user_applications(sender, instance, created, update_fields=None, **kwargs):
+    # Входът записва само last_login; индексът се обновява само при промяна на имената.
+    if created or (update_fields is not None and not SEARCH_USER_FIELDS.intersection(update_fields)):
+        return
+    for model in (StudentApplication, LecturerApplication):
+        if model.objects.filter(pk=instance.pk).exists():
+            index_applications(model, [instance.pk])
+
+
+@receiver(pre_save, sender=StudentApplication)
+@receiver(pre_save, sender=LecturerApplication)
+def remember_stat_values(sender, instance, update_fields=None, **kwargs):
+    # Старите стойности са нужни, за да се извадят от броячите в post_save.
+    instance._stat_values = None
+    if instance._state.adding or (update_fields is not None and not set(STAT_FIELDS[sender]) & set(update_fields)):
+        return
+    instance._stat_values = sender.objects.filter(pk=instance.pk).values(*STAT_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=StudentApplication)
+@receiver(post_save, sender=LecturerApplication)
+def update_stats(sender, instance, created, update_fields=None, **kwargs):
+    old_values = getattr(instance, '_stat_values', None)
+    if not created and old_values is None:
+        return
+    record_change(sender, old_values, stat_values(instance))
+
+
+@receiver(post_delete, sender=StudentApplication)
+@receiver(post_delete, sender=LecturerApplication)
+def remove_from_stats(sender, instance, **kwargs):
+    record_change(sender, stat_values(instance), None)
+
+
+@receiver(post_delete, sender=Specialty)
+def rebuild_specialty_stats(sender, instance, **kwargs):
+    # SET_NULL по желанията не изпраща сигнали за кандидатурите; броячите се сверяват
+    # от фоновата опашка, а не в заявката, която трие специалността.
+    transaction.on_commit(lambda: enqueue('rebuild_stats'))
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, request=None, **kwargs):
+    record_login_failure(request, credentials.get('username'))
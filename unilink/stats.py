@@ -0,0 +1,253 @@
+import functools
+import operator
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import AdmissionStat, JobPosting, LecturerApplication, Specialty, StudentApplication
+
+# Скалата на успеха в българското училище: долни граници, от най-високата надолу.
+GPA_BUCKETS = (
+    (Decimal('5.50'), _('Отличен')),
+    (Decimal('4.50'), _('Много добър')),
+    (Decimal('3.50'), _('Добър')),
+    (Decimal('3.00'), _('Среден')),
+    (Decimal('0'), _('Слаб')),
+)
+PRIORITY_FIELDS = ('specialty_priority_1_id', 'specialty_priority_2_id', 'specialty_priority_3_id')
+STATUS_DIMENSIONS = {
+    StudentApplication: 'student_status',
+    LecturerApplication: 'lecturer_status',
+}
+# Полетата, от които зависят броячите; записи, които не ги променят, не ги пипат.
+STAT_FIELDS = {
+    StudentApplication: ('status', 'gpa', *PRIORITY_FIELDS),
+    LecturerApplication: ('status', 'applied_job_id'),
+}
+NO_SPECIALTY = '-'
+ZERO = Decimal('0')
+
+
+def gpa_bucket(gpa):
+    for index, (lower, _label) in enumerate(GPA_BUCKETS):
+        if gpa >= lower:
+            return index
+    return len(GPA_BUCKETS) - 1
+
+
+def stat_values(instance):
+    return {field: getattr(instance, field) for field in STAT_FIELDS[type(instance)]}
+
+
+def contributions(model, values):
+    # Кои броячи увеличава един запис: {(измерение, ключ): (брой, сума)}.
+    result = {(STATUS_DIMENSIONS[model], values['status']): (1, ZERO)}
+    if model is LecturerApplication:
+        result[('job', str(values['applied_job_id']))] = (1, ZERO)
+        return result
+
+    gpa = Decimal(str(values['gpa']))
+    for number, field in enumerate(PRIORITY_FIELDS, 1):
+        if values[field] is not None:
+            result[(f'priority_{number}', str(values[field]))] = (1, ZERO)
+    specialty = values['specialty_priority_1_id'] or NO_SPECIALTY
+    result[('gpa', f'{specialty}:{gpa_bucket(gpa)}')] = (1, gpa)
+    return result
+
+
+def add_contributions(deltas, model, values, sign):
+    for key, (count, total) in contributions(model, values).items():
+        deltas[key][0] += sign * count
+        deltas[key][1] += sign * total
+
+
+def apply_deltas(deltas):
+    deltas = {key: (count, total) for key, (count, total) in deltas.items() if count or total}
+    if not deltas:
+        return
+
+    # Липсващите редове се създават с нули, а промяната е един UPDATE с F(),
+    # така че паралелните записи не се презаписват взаимно.
+    AdmissionStat.objects.bulk_create(
+        [AdmissionStat(dimension=dimension, key=key) for dimension, key in deltas], ignore_conflicts=True
+    )
+    conditions = [Q(dimension=dimension, key=key) for dimension, key in deltas]
+    AdmissionStat.objects.filter(functools.reduce(operator.or_, conditions)).update(
+        count=F('count') + Case(
+            *[When(condition, then=Value(count)) for condition, (count, _total) in zip(conditions, deltas.values())],
+            default=Value(0),
+        ),
+        total=F('total') + Case(
+            *[When(condition, then=Value(total)) for condition, (_count, total) in zip(conditions, deltas.values())],
+            default=Value(ZERO),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, ZERO])
+
+
+def record_change(model, old_values=None, new_values=None):
+    deltas = new_deltas()
+    if old_values is not None:
+        add_contributions(deltas, model, old_values, -1)
+    if new_values is not None:
+        add_contributions(deltas, model, new_values, 1)
+    apply_deltas(deltas)
+
+
+def record_created(model, instances):
+    # За bulk_create, който не изпраща post_save.
+    deltas = new_deltas()
+    for instance in instances:
+        add_contributions(deltas, model, stat_values(instance), 1)
+    apply_deltas(deltas)
+
+
+def record_status_change(model, from_status, to_status, count):
+    # За queryset.update() на статуса, когато броят на засегнатите редове е известен.
+    deltas = new_deltas()
+    deltas[(STATUS_DIMENSIONS[model], from_status)][0] -= count
+    deltas[(STATUS_DIMENSIONS[model], to_status)][0] += count
+    apply_deltas(deltas)
+
+
+def update_status(queryset, status, from_statuses, **values):
+    # queryset.update() на статуса с по един UPDATE за всеки стар статус: броят на
+    # променените редове от всеки статус е точен и броячите се местят без пълно преизчисляване.
+    # Вика се в транзакция, за да се запишат редовете и броячите заедно.
+    updated = 0
+    for from_status in from_statuses:
+        count = queryset.filter(status=from_status).update(status=status, **values)
+        if count and from_status != status:
+            record_status_change(queryset.model, from_status, status, count)
+        updated += count
+    return updated
+
+
+def compute_stats():
+    # Пълно преизчисляване с GROUP BY заявки; използва се само от rebuild_stats.
+    stats = {}
+    for model, dimension in STATUS_DIMENSIONS.items():
+        for row in model.objects.values('status').annotate(count=Count('pk')).order_by():
+            stats[(dimension, row['status'])] = (row['count'], ZERO)
+
+    for number, field in enumerate(PRIORITY_FIELDS, 1):
+        rows = (
+            StudentApplication.objects.filter(**{f'{field}__isnull': False})
+            .values(field).annotate(count=Count('pk')).order_by()
+        )
+        for row in rows:
+            stats[(f'priority_{number}', str(row[field]))] = (row['count'], ZERO)
+
+    bucket = Case(
+        *[When(gpa__gte=lower, then=Value(index)) for index, (lower, _label) in enumerate(GPA_BUCKETS)],
+        default=Value(len(GPA_BUCKETS) - 1),
+        output_field=IntegerField(),
+    )
+    rows = (
+        StudentApplication.objects.annotate(bucket=bucket)
+        .values('specialty_priority_1_id', 'bucket').annotate(count=Count('pk'), total=Sum('gpa')).order_by()
+    )
+    for row in rows:
+        specialty = row['specialty_priority_1_id'] or NO_SPECIALTY
+        stats[('gpa', f'{specialty}:{row["bucket"]}')] = (row['count'], row['total'] or ZERO)
+
+    for row in LecturerApplication.objects.values('applied_job_id').annotate(count=Count('pk')).order_by():
+        stats[('job', str(row['applied_job_id']))] = (row['count'], ZERO)
+    return stats
+
+
+def rebuild_stats(dry_run=False):
+    # Сверява броячите с таблиците и връща разминаванията:
+    # [((измерение, ключ), (записан брой, сума), (реален брой, сума))].
+    # Броячите и GROUP BY заявките се четат от един snapshot без заключване, а
+    # разликата се прилага като делта (apply_deltas). Така кандидатстването не чака
+    # пълните сканирания, а промените, направени междувременно, не се губят.
+    snapshot = connection.vendor == 'postgresql' and not connection.in_atomic_block
+    with transaction.atomic():
+        if snapshot:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        stored = {(row.dimension, row.key): (row.count, row.total) for row in AdmissionStat.objects.all()}
+        actual = compute_stats()
+
+    drift = []
+    for key in sorted(stored.keys() | actual.keys()):
+        before = stored.get(key, (0, ZERO))
+        after = actual.get(key, (0, ZERO))
+        if before != after:
+            drift.append((key, before, after))
+
+    if not dry_run and drift:
+        deltas = new_deltas()
+        for key, (count, total), (actual_count, actual_total) in drift:
+            deltas[key] = [actual_count - count, actual_total - total]
+        with transaction.atomic():
+            apply_deltas(deltas)
+            # Ключове, които вече не съществуват (напр. изтрита специалност), остават на нула.
+            stale = [Q(dimension=dimension, key=key) for dimension, key in stored.keys() - actual.keys()]
+            if stale:
+                AdmissionStat.objects.filter(functools.reduce(operator.or_, stale), count=0, total=0).delete()
+    return drift
+
+
+def average(count, total):
+    return (total / count).quantize(Decimal('0.01')) if count else None
+
+
+def dashboard_stats():
+    # Една заявка към броячите и по една към (малките) номенклатури, независимо
+    # от броя на кандидатурите.
+    stats = {
+        (row.dimension, row.key): (row.count, row.total)
+        for row in AdmissionStat.objects.filter(count__gt=0)
+    }
+    updated_at = AdmissionStat.objects.aggregate(updated_at=Max('updated_at'))['updated_at']
+
+    def count(dimension, key):
+        return stats.get((dimension, str(key)), (0, ZERO))[0]
+
+    statuses = {
+        model: [(label, count(dimension, value)) for value, label in model.STATUS_CHOICES]
+        for model, dimension in STATUS_DIMENSIONS.items()
+    }
+
+    specialties = []
+    rows = [(str(pk), name) for pk, name in Specialty.objects.order_by('name').values_list('pk', 'name')]
+    for key, name in rows + [(NO_SPECIALTY, _('Без първо желание'))]:
+        # Разпределението по успех е по първо желание и сумира до броя за него.
+        buckets = [stats.get(('gpa', f'{key}:{index}'), (0, ZERO)) for index in range(len(GPA_BUCKETS))]
+        priorities = [sum(bucket_count for bucket_count, _total in buckets),
+                      count('priority_2', key), count('priority_3', key)]
+        if not any(priorities):
+            continue
+        specialties.append({
+            'name': name,
+            'priorities': priorities,
+            'average_gpa': average(priorities[0], sum(total for _count, total in buckets)),
+            'distribution': [bucket_count for bucket_count, _total in buckets],
+        })
+
+    jobs = [
+        (title, count('job', pk))
+        for pk, title in JobPosting.objects.order_by('title').values_list('pk', 'title')
+    ]
+
+    return {
+        'has_stats': updated_at is not None,
+        'updated_at': updated_at,
+        'student_statuses': statuses[StudentApplication],
+        'student_total': sum(value for _label, value in statuses[StudentApplication]),
+        'lecturer_statuses': statuses[LecturerApplication],
+        'lecturer_total': sum(value for _label, value in statuses[LecturerApplication]),
+        'gpa_labels': [label for _lower, label in GPA_BUCKETS],
+        'specialties': specialties,
+        'jobs': sorted(jobs, key=lambda job: -job[1]),
+    }
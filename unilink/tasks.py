@@ -0,0 +1,60 @@
+from django.apps import apps
+from django.db import transaction
+
+from .admissions import run_admission_ranking
+from .approvals import CredentialStore, approve_users
+from .imports import IMPORT_REPORT_ROWS, import_stored_file
+from .jobs import register_task, set_progress
+from .stats import rebuild_stats, update_status
+
+APPLICATION_STATUS_CHUNK_SIZE = 1000
+
+
+@register_task('approve_users')
+def approve_users_task(job, user_ids):
+    approved = approve_users(
+        user_ids,
+        event=f'job-{job.pk}',
+        progress=lambda done, total: set_progress(job, done, total),
+        store=CredentialStore(job.pk),
+    )
+    # Паролите са в CredentialStore до първото изтегляне (вж. UserAdmin.approval_export_view).
+    return {'approved': approved}
+
+
+@register_task('import_applicants')
+def import_applicants_task(job, name):
+    report = import_stored_file(name, progress=lambda done, total: set_progress(job, done, total))
+    return {
+        'created': report.created,
+        'rejected': len(report.rejected),
+        'rejected_rows': [[line, row.get('username', ''), errors]
+                          for line, row, errors in report.rejected[:IMPORT_REPORT_ROWS]],
+    }
+
+
+@register_task('set_application_status')
+def set_application_status_task(job, model, pks, status):
+    model = apps.get_model(model)
+    total = len(pks)
+    updated = 0
+    # update() не изпраща сигнали; update_status мести броячите по статус заедно с редовете.
+    from_statuses = [value for value, _label in model.STATUS_CHOICES if value != status]
+    for start in range(0, total, APPLICATION_STATUS_CHUNK_SIZE):
+        with transaction.atomic():
+            updated += update_status(
+                model.objects.filter(pk__in=pks[start:start + APPLICATION_STATUS_CHUNK_SIZE]), status, from_statuses
+            )
+        set_progress(job, min(start + APPLICATION_STATUS_CHUNK_SIZE, total), total)
+    return {'updated': updated}
+
+
+@register_task('rank_applicants')
+def rank_applicants_task(job, dry_run=False):
+    summary = run_admission_ranking(dry_run=dry_run)
+    return {str(specialty_id): count for specialty_id, count in summary.items()}
+
+
+@register_task('rebuild_stats')
+def rebuild_stats_task(job):
+    return {'drift': len(rebuild_stats())}
@@ -1,3 +1,437 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admissions import SKIPPED, allocate, load_candidates, load_capacities, run_admission_ranking, save_allocation
+from .applications import ApplicationSubmission
+from .backends import CustomAuthBackend
+from .cache import invalidate_user
+from .exports import _xlsx_cell, stream_csv
+from .forms import CustomUserCreationForm, StudentApplicationForm
+from .hashers import rehash_password
+from .imports import StudentApplicationImporter
+from .notifications import queue_notifications
+from .ratelimit import client_ip, login_limiters
+from .routers import read_replicas, replica_reads
+from .search import index_applications, search_applications
+from .stats import rebuild_stats
+from .tasks import set_application_status_task
+from .jobs import heartbeat, requeue_stale_jobs, run_next_job
+from .models import AdmissionStat, Job, JobPosting, JobStatus, LecturerApplication, Outbox, Role, Specialty, StudentApplication
+
+User = get_user_model()
+
+
+def create_user(username, role=Role.STUDENT, **fields):
+    return User.objects.create(username=username, first_name='Тест', last_name=username, role=role, **fields)
+
+
+def create_student_application(index, specialty, gpa=Decimal('5.50'), **fields):
+    return StudentApplication.objects.create(
+        user=create_user(f'student{index}'),
+        egn=f'{index:010d}',
+        high_school='СУ "Тест"',
+        gpa=gpa,
+        specialty_priority_1=specialty,
+        motivation='Мотивация',
+        **fields,
+    )
+
+
+def create_lecturer_application(index, job, **fields):
+    return LecturerApplication.objects.create(
+        user=create_user(f'lecturer{index}', role=Role.LECTURER),
+        education_path='Доктор',
+        teaching_experience='5 години',
+        courses_taught='Алгоритми',
+        research_publications='-',
+        applied_job=job,
+        motivation_goals='Мотивация',
+        **fields,
+    )
+
+
+class ChangelistQueryBudgetTests(TestCase):
+    # Броят заявки за една страница от списъка не зависи от броя редове
+    # и не надхвърля changelist_query_budget на съответния админ.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('budget_admin', role=Role.ADMIN, is_staff=True, is_superuser=True)
+        cls.specialty = Specialty.objects.create(name='Информатика', capacity=10)
+        cls.job = JobPosting.objects.create(title='Асистент', description='-')
+
+    def changelist_queries(self, model):
+        request = RequestFactory().get('/')
+        request.user = self.admin_user
+        with CaptureQueriesContext(connection) as captured:
+            response = admin.site._registry[model].changelist_view(request)
+            # Заявките от list_display се правят при рендерирането.
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def assert_within_budget(self, model, create):
+        for index in range(3):
+            create(index)
+        queries = self.changelist_queries(model)
+        self.assertLessEqual(queries, admin.site._registry[model].changelist_query_budget)
+
+        for index in range(3, 30):
+            create(index)
+        with self.assertNumQueries(queries):
+            self.changelist_queries(model)
+
+    def test_student_application_changelist(self):
+        self.assert_within_budget(
+            StudentApplication, lambda index: create_student_application(index, self.specialty)
+        )
+
+    def test_lecturer_application_changelist(self):
+        self.assert_within_budget(
+            LecturerApplication, lambda index: create_lecturer_application(index, self.job)
+        )
+
+
+class AdmissionRankingTests(TestCase):
+    def test_reviewer_rejections_are_not_reranked(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=1)
+        rejected = create_student_application(1, specialty, status='REJECTED', gpa=Decimal('6.00'))
+        admitted = create_student_application(2, specialty)
+        not_admitted = create_student_application(3, specialty, gpa=Decimal('4.00'))
+
+        run_admission_ranking()
+
+        for application in (rejected, admitted, not_admitted):
+            application.refresh_from_db()
+        self.assertEqual(rejected.status, 'REJECTED')
+        self.assertEqual(admitted.admitted_specialty, specialty)
+        self.assertEqual(not_admitted.status, 'NOT_ADMITTED')
+
+        # При повторно класиране некласираните участват отново.
+        specialty.capacity = 2
+        specialty.save()
+        run_admission_ranking()
+        not_admitted.refresh_from_db()
+        self.assertEqual(not_admitted.admitted_specialty, specialty)
+
+    def test_status_changes_during_ranking_are_kept(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=5)
+        reviewer = create_user('reviewer', role=Role.ADMIN)
+        rejected, claimed, ranked = [create_student_application(index, specialty) for index in range(3)]
+        candidates = load_candidates()
+        admitted = allocate(candidates, load_capacities())
+
+        # Проверяващ отказва една кандидатура и взема друга, докато класирането тече.
+        StudentApplication.objects.filter(pk=rejected.pk).update(status='REJECTED')
+        StudentApplication.objects.filter(pk=claimed.pk).update(status='IN_REVIEW', reviewer=reviewer)
+        summary = save_allocation(candidates, admitted)
+
+        self.assertEqual(summary, {specialty.pk: 1, SKIPPED: 2})
+        rejected.refresh_from_db()
+        claimed.refresh_from_db()
+        self.assertEqual((rejected.status, claimed.status, claimed.reviewer), ('REJECTED', 'IN_REVIEW', reviewer))
+        self.assertEqual(StudentApplication.objects.get(pk=ranked.pk).status, 'APPROVED')
+
+    def test_ranking_releases_claimed_applications(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=5)
+        reviewer = create_user('reviewer', role=Role.ADMIN)
+        application = create_student_application(1, specialty, status='IN_REVIEW', reviewer=reviewer)
+
+        run_admission_ranking()
+
+        application.refresh_from_db()
+        self.assertEqual((application.status, application.reviewer), ('APPROVED', None))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 търсенето е само за SQLite')
+class SqliteSearchTests(TestCase):
+    def test_match_is_combined_with_queryset_filters(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=10)
+        for index in range(5):
+            create_student_application(index, specialty)
+        rejected = create_student_application(5, specialty, status='REJECTED')
+        index_applications(StudentApplication)
+
+        queryset = StudentApplication.objects.filter(status='REJECTED')
+        self.assertEqual(list(search_applications(queryset, 'мотивация')), [rejected])
+
+        ranked = search_applications(StudentApplication.objects.all(), 'student5')
+        self.assertEqual([application.pk for application in ranked], [rejected.pk])
+        self.assertGreater(ranked[0].search_rank, 0)
+
+
+class ExportEscapingTests(TestCase):
+    def test_formula_prefixes_are_escaped(self):
+        rows = [['=HYPERLINK("http://x")', '+359888123456', '-1+1', '@SUM(A1)', 'Иван', Decimal('-1.50')]]
+        content = b''.join(stream_csv(rows)).decode('utf-8-sig')
+        self.assertEqual(content, '"\'=HYPERLINK(""http://x"")",\'+359888123456,\'-1+1,\'@SUM(A1),Иван,-1.50\r\n')
+        self.assertIn("<t xml:space=\"preserve\">'=1+1</t>", _xlsx_cell('=1+1'))
+        self.assertEqual(_xlsx_cell(Decimal('-1.50')), '<c><v>-1.50</v></c>')
+
+
+class AdminImportTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        Specialty.objects.create(name='Информатика', capacity=10)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def test_import_runs_as_job(self):
+        header = 'username,first_name,last_name,email,egn,date_of_birth,high_school,gpa,specialty_priority_1,motivation'
+        rows = [
+            'ivan,Иван,Иванов,ivan@example.com,0000000001,2005-01-01,СУ,5.50,Информатика,Мотивация',
+            'petar,Петър,Петров,petar@example.com,0000000002,2005-01-01,СУ,5.50,Непозната,Мотивация',
+        ]
+        upload = SimpleUploadedFile('applicants.csv', '\n'.join([header, *rows]).encode('utf-8'))
+
+        response = self.client.post(reverse('admin:unilink_studentapplication_import'), {'csv_file': upload})
+
+        job = Job.objects.get(task='import_applicants')
+        self.assertRedirects(response, reverse('admin:unilink_studentapplication_import_progress', args=[job.pk]))
+        self.assertFalse(StudentApplication.objects.exists())
+
+        run_next_job()
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual((job.result['created'], job.result['rejected']), (1, 1))
+        self.assertEqual(job.result['rejected_rows'][0][:2], [3, 'petar'])
+        self.assertTrue(StudentApplication.objects.filter(user__username='ivan').exists())
+
+        response = self.client.get(reverse('admin:unilink_studentapplication_import_progress', args=[job.pk]))
+        self.assertContains(response, 'petar')
+
+
+class StudentApplicationImporterTests(TestCase):
+    def test_usernames_are_case_insensitive_and_date_of_birth_is_required(self):
+        Specialty.objects.create(name='Информатика', capacity=10)
+        create_user('ivan')
+        lines = [
+            'username,first_name,last_name,email,egn,date_of_birth,high_school,gpa,specialty_priority_1,motivation',
+            'Ivan,Иван,Иванов,ivan@example.com,0000000001,2005-01-01,СУ,5.50,Информатика,Мотивация',
+            'maria,Мария,Петрова,maria@example.com,0000000002,2005-01-01,СУ,5.50,Информатика,Мотивация',
+            'MARIA,Мария,Петрова,maria@example.com,0000000003,2005-01-01,СУ,5.50,Информатика,Мотивация',
+            'georgi,Георги,Георгиев,georgi@example.com,0000000004,,СУ,5.50,Информатика,Мотивация',
+        ]
+
+        report = StudentApplicationImporter().run(lines)
+
+        self.assertEqual(report.created, 1)
+        rejected = {row['username']: errors for _line, row, errors in report.rejected}
+        self.assertEqual(set(rejected), {'Ivan', 'MARIA', 'georgi'})
+        self.assertTrue(any(error.startswith('date_of_birth:') for error in rejected['georgi']))
+
+
+def student_submission(specialty, **data):
+    data = {
+        'first_name': 'Иван', 'last_name': 'Иванов', 'email': 'ivan@example.com', 'role': Role.STUDENT,
+        'username': 'ivan', 'password1': 'Kandidat-2025!', 'password2': 'Kandidat-2025!',
+        'egn': '0000000001', 'date_of_birth': '2005-01-01', 'high_school': 'СУ "Тест"', 'gpa': '5.50',
+        'specialty_priority_1': specialty.pk, 'motivation': 'Мотивация', 'data_verified': 'on',
+        **data,
+    }
+    return ApplicationSubmission(CustomUserCreationForm(data), StudentApplicationForm(data), Role.STUDENT)
+
+
+class ApplicationSubmissionTests(TestCase):
+    def test_unique_conflicts_are_reported_with_other_errors(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=10)
+        existing = create_student_application(1, specialty)
+        submission = student_submission(specialty, username=existing.user.username.upper(), egn=existing.egn,
+                                        email='не-е-имейл')
+
+        self.assertFalse(submission.is_valid())
+        self.assertIn('email', submission.user_form.errors)
+        self.assertIn('username', submission.user_form.errors)
+        self.assertIn('egn', submission.application_form.errors)
+
+
+class ConcurrentSubmissionTests(TransactionTestCase):
+    def test_only_one_duplicate_submission_is_saved(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=10)
+        validated = threading.Barrier(2)
+        # SQLite не допуска два паралелни записа; на PostgreSQL уникалните индекси
+        # решават надпреварата по същия начин.
+        writing = threading.Lock()
+        results = []
+
+        def submit():
+            try:
+                submission = student_submission(specialty)
+                valid = submission.is_valid()
+                # И двете заявки минават проверката за уникалност, преди някоя да запише.
+                validated.wait()
+                with writing:
+                    results.append(valid and submission.save() is not None)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False, True])
+        self.assertEqual(StudentApplication.objects.count(), 1)
+
+
+class NotificationDedupeTests(TestCase):
+    def test_repeated_event_is_ignored_but_new_event_is_queued(self):
+        user = create_user('ivan', email='ivan@example.com')
+
+        queue_notifications('account_approved', [user], event='job-1')
+        queue_notifications('account_approved', [user], event='job-1')
+        queue_notifications('account_approved', [user], event='job-2')
+
+        self.assertEqual(Outbox.objects.filter(kind='account_approved', recipient=user.email).count(), 2)
+
+
+class LoginRateLimitTests(TestCase):
+    def test_client_ip_comes_from_trusted_proxy_header(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1',
+                                        HTTP_X_FORWARDED_FOR='198.51.100.7, 203.0.113.5')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with override_settings(UNILINK_TRUSTED_PROXY_HEADER='HTTP_X_FORWARDED_FOR'):
+            # Първият адрес е подаден от клиента; последният е добавен от proxy-то.
+            self.assertEqual(client_ip(request), '203.0.113.5')
+            with override_settings(UNILINK_TRUSTED_PROXY_COUNT=3):
+                self.assertEqual(client_ip(request), '10.0.0.1')
+
+    def test_reset_clears_only_the_limiter_keys(self):
+        limiter = login_limiters()['ip']
+        limiter.hit('203.0.113.5')
+        limiter.cache.set('unilink:other', 1)
+        self.addCleanup(limiter.cache.delete, 'unilink:other')
+
+        limiter.reset('203.0.113.5')
+
+        keys = limiter.keys('203.0.113.5', time.time())
+        self.assertEqual(limiter.estimate(limiter.cache.get_many(keys[:2]), keys), 0)
+        self.assertEqual(limiter.cache.get('unilink:other'), 1)
+
+
+class ServiceEmailLoginTests(TestCase):
+    def test_service_email_is_unique_regardless_of_case(self):
+        lecturer = create_user('lecturer', role=Role.LECTURER, service_email='Ivan.Petrov@uni.bg')
+        self.assertEqual(CustomAuthBackend().lookup_user(' ivan.petrov@UNI.bg '), lecturer)
+
+        with self.assertRaises(IntegrityError):
+            create_user('lecturer_copy', role=Role.LECTURER, service_email='ivan.petrov@uni.bg')
+
+
+class PasswordRehashTests(TestCase):
+    def test_sessions_survive_rehash_until_password_change(self):
+        user = create_user('ivan')
+        user.set_password('Kandidat-2025!')
+        user.save()
+        session_hash = user.get_session_auth_hash()
+
+        rehash_password(user.pk, user.password, 'Kandidat-2025!')
+
+        user = User.objects.get(pk=user.pk)
+        self.assertNotEqual(user.get_session_auth_hash(), session_hash)
+        self.assertIn(session_hash, list(user.get_session_auth_fallback_hash()))
+
+        user.set_password('Nova-Parola-2025!')
+        user.save()
+        user = User.objects.get(pk=user.pk)
+        self.assertNotIn(session_hash, list(user.get_session_auth_fallback_hash()))
+
+
+@skipUnless(read_replicas(), 'Нужна е реплика (UNILINK_DB_REPLICAS); в тестовете тя е огледало на основната база.')
+class ReplicaRoutingTests(TransactionTestCase):
+    # TransactionTestCase: в транзакция (TestCase) рутерът винаги чете от основната база.
+    databases = {DEFAULT_DB_ALIAS, *read_replicas()}
+
+    def setUp(self):
+        self.replica = connections[read_replicas()[0]]
+        self.primary = connections[DEFAULT_DB_ALIAS]
+
+    def test_replica_reads_go_to_the_replica(self):
+        with CaptureQueriesContext(self.replica) as replica_queries, replica_reads():
+            StudentApplication.objects.count()
+        self.assertEqual(len(replica_queries), 1)
+
+    def test_get_user_cache_miss_reads_the_primary(self):
+        user = create_user('ivan')
+        invalidate_user(user.pk)
+        backend = CustomAuthBackend()
+
+        with CaptureQueriesContext(self.replica) as replica_queries, \
+                CaptureQueriesContext(self.primary) as primary_queries, replica_reads():
+            self.assertEqual(backend.get_user(user.pk), user)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(len(primary_queries), 1)
+
+        # Следващата заявка е от кеша.
+        with self.assertNumQueries(0), self.assertNumQueries(0, using=self.replica.alias):
+            self.assertEqual(backend.get_user(user.pk), user)
+
+
+class AdmissionStatsTests(TestCase):
+    def test_bulk_status_changes_keep_counters_in_sync(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=1)
+        applications = [create_student_application(index, specialty) for index in range(3)]
+        create_student_application(3, specialty, status='REJECTED')
+        job = Job.objects.create(task='set_application_status')
+
+        set_application_status_task(job, 'unilink.StudentApplication', [applications[0].pk], 'IN_REVIEW')
+        run_admission_ranking()
+        set_application_status_task(job, 'unilink.StudentApplication', [a.pk for a in applications], 'REJECTED')
+
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+    def test_rebuild_applies_only_the_drift(self):
+        specialty = Specialty.objects.create(name='Информатика', capacity=1)
+        create_student_application(1, specialty)
+        AdmissionStat.objects.filter(dimension='student_status', key='SUBMITTED').update(count=5)
+        AdmissionStat.objects.create(dimension='priority_2', key='999', count=2)
+
+        drift = rebuild_stats()
+
+        self.assertEqual(len(drift), 2)
+        self.assertEqual(AdmissionStat.objects.get(dimension='student_status', key='SUBMITTED').count, 1)
+        self.assertFalse(AdmissionStat.objects.filter(dimension='priority_2', key='999').exists())
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+
+class StaleJobTests(TestCase):
+    def test_only_jobs_without_heartbeat_are_requeued(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        running = Job.objects.create(task='rebuild_stats', status=JobStatus.RUNNING, attempts=1)
+        abandoned = Job.objects.create(task='rebuild_stats', status=JobStatus.RUNNING, attempts=1)
+        Job.objects.filter(pk=running.pk).update(locked_at=long_ago)
+        Job.objects.filter(pk=abandoned.pk).update(locked_at=long_ago, updated_at=long_ago)
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=5)), 1)
+
+        self.assertEqual(Job.objects.get(pk=running.pk).status, JobStatus.RUNNING)
+        self.assertEqual(Job.objects.get(pk=abandoned.pk).status, JobStatus.QUEUED)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    def test_heartbeat_refreshes_updated_at(self):
+        job = Job.objects.create(task='rebuild_stats', status=JobStatus.RUNNING, attempts=1)
+        long_ago = timezone.now() - timedelta(hours=2)
+        Job.objects.filter(pk=job.pk).update(updated_at=long_ago)
+
+        with heartbeat(job, interval=0.05):
+            time.sleep(0.3)
+
+        self.assertGreater(Job.objects.get(pk=job.pk).updated_at, long_ago)
@@ -1,19 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'unilink'
 
+# Под ASGI (Uni_Link.asgi) входът и таблата са async; под WSGI остават синхронните.
+if getattr(settings, 'UNILINK_ASYNC_VIEWS', False):
+    login_view, logout_view = async_views.login_view, async_views.logout_view
+    dashboard_views = async_views
+else:
+    login_view, logout_view = views.CustomLoginView.as_view(), views.CustomLogoutView.as_view()
+    dashboard_views = views
+
 urlpatterns = [
-    path('login/', views.CustomLoginView.as_view(), name='login'),
-    path('logout/', views.CustomLogoutView.as_view(), name='logout'),
+    path('login/', login_view, name='login'),
+    path('logout/', logout_view, name='logout'),
 
-    path('application/choice/', views.application_choice, name='application_choice'),
+    path('application/choice/', dashboard_views.application_choice, name='application_choice'),
     path('apply/student/', views.StudentApplicationView.as_view(), name='student_apply'),
     path('apply/lecturer/', views.LecturerApplicationView.as_view(), name='lecturer_apply'),
     path('registration/pending/', views.registration_pending, name='registration_pending'),
 
     path('', views.home, name='home'),             
-    path('dashboard/', views.dashboard, name='dashboard'),  
-    path('student/', views.student_dashboard, name='student_dashboard'),
-    path('lecturer/', views.lecturer_dashboard, name='lecturer_dashboard'),
+    path('dashboard/', dashboard_views.dashboard, name='dashboard'),  
+    path('student/', dashboard_views.student_dashboard, name='student_dashboard'),
+    path('lecturer/', dashboard_views.lecturer_dashboard, name='lecturer_dashboard'),
 ]
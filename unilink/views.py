@@ -4,9 +4,12 @@ from django.views.generic import CreateView, TemplateView
 from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import reverse_lazy
 from django.contrib import messages
+from django.utils.decorators import method_decorator
 
+from .applications import ApplicationSubmission
 from .forms import CustomUserCreationForm, CustomLoginForm, StudentApplicationForm, LecturerApplicationForm
 from .models import Role
+from .page_cache import cache_anonymous_page
 
 
 def is_student(user):
@@ -17,6 +20,14 @@ def is_lecturer(user):
     return user.is_authenticated and user.role == Role.LECTURER
 
 
+LOGOUT_MESSAGE = "Успешно излязохте от системата. Очакваме Ви отново!"
+
+
+def login_error(form):
+    return form.errors.get('__all__', ['Невалиден идентификатор или парола.'])[0]
+
+
+@cache_anonymous_page
 def home(request):
     if request.user.is_authenticated:
         return redirect('unilink:dashboard')
@@ -24,6 +35,7 @@ def home(request):
     return render(request, 'unilink/home.html')
 
 
+@cache_anonymous_page
 def registration_pending(request):
     return render(request, 'unilink/registration_pending.html')
 
@@ -66,14 +78,14 @@ class CustomLoginView(LoginView):
         return reverse_lazy('unilink:dashboard')
 
     def form_invalid(self, form):
-        error_message = form.errors.get('__all__', ['Невалиден идентификатор или парола.'])[0]
         return render(self.request, self.template_name, {
             'form': form,
-            'error': error_message
+            'error': login_error(form)
         })
 
 
 
+@method_decorator(cache_anonymous_page, name='get')
 class BaseApplicationCreateView(CreateView):
 
     success_url = reverse_lazy('unilink:registration_pending')
@@ -81,28 +93,26 @@ class BaseApplicationCreateView(CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['user_form'] = CustomUserCreationForm(self.request.POST if self.request.method == 'POST' else None)
+        context.setdefault('user_form', CustomUserCreationForm())
         return context
 
-    def form_valid(self, form):
-        user_form = CustomUserCreationForm(self.request.POST)
-        if not user_form.is_valid():
-            return self.form_invalid(form)
+    def post(self, request, *args, **kwargs):
+        self.object = None
+        submission = ApplicationSubmission(CustomUserCreationForm(request.POST), self.get_form(), self.user_role)
 
-        user = user_form.save(commit=False)
-        user.role = self.user_role
-        user.is_approved = False  
-        user.save()
+        if submission.is_valid():
+            self.object = submission.save()
 
-        self.object = form.save(commit=False)
-        self.object.user = user  
-        self.object.status = 'SUBMITTED'  
-        self.object.save()
+        if self.object is None:
+            return self.render_to_response(self.get_context_data(
+                form=submission.application_form,
+                user_form=submission.user_form,
+            ))
 
         messages.success(self.request,
-                         f"Вашето кандидатстване като {user.get_role_display()} е изпратено успешно и очаква одобрение.")
+                         f"Вашето кандидатстване като {self.object.user.get_role_display()} е изпратено успешно и очаква одобрение.")
 
-        return super().form_valid(form)
+        return redirect(self.get_success_url())
 
 
 class StudentApplicationView(BaseApplicationCreateView):
@@ -127,6 +137,7 @@ class LecturerApplicationView(BaseApplicationCreateView):
 
 
 
+@cache_anonymous_page
 def application_choice(request):
     if request.user.is_authenticated:
         return redirect('unilink:dashboard')
@@ -141,5 +152,5 @@ class CustomLogoutView(LogoutView):
     next_page = 'unilink:login'
 
     def dispatch(self, request, *args, **kwargs):
-        messages.success(request, "Успешно излязохте от системата. Очакваме Ви отново!")
+        messages.success(request, LOGOUT_MESSAGE)
         return super().dispatch(request, *args, **kwargs)